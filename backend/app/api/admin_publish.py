@@ -1,37 +1,46 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from ..utils.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..utils.database import get_db, get_async_db
 from ..core.security import get_admin_user
 from ..models.post import Post
 from ..models.life_post import LifePost
 from ..models.user import User
+from ..services.search_service import sync_document
+from ..services.post_service import set_post_published, delete_post
+from ..services.life_service import set_life_published, delete_life
+from ..services.feed_service import feed, parse_kinds, SECTIONS
+from ..utils.response_cache import response_cache
 
 router = APIRouter()
 
+# 发布管理只覆盖可切换发布状态的两类内容
+PUBLISH_KINDS = ("post", "life")
+
 @router.get('/')
-def list_publish(db: Session = Depends(get_db), user: User = Depends(get_admin_user)):
-    posts = db.query(Post).all()
-    lifes = db.query(LifePost).all()
-    items = []
-    for p in posts:
-        items.append({
-            "id": p.id,
-            "kind": "post",
-            "title": p.title,
-            "section": "笔记分享",
-            "is_published": p.is_published,
-            "uploader_name": p.uploader_name,
-        })
-    for l in lifes:
-        items.append({
-            "id": l.id,
-            "kind": "life",
-            "title": l.title,
-            "section": "个人生活",
-            "is_published": getattr(l, "is_published", True),
-            "uploader_name": getattr(l, "uploader_name", None),
-        })
-    return {"items": items}
+async def list_publish(
+    kind: str | None = None,
+    is_published: bool | None = None,
+    q: str | None = Query(None, max_length=200),
+    page: int = Query(1, ge=1),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    with_total: bool | None = None,
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_admin_user),
+):
+    # 与公开信息流共用 UNION ALL 查询，筛选与分页在库内完成；管理端读主库且不限发布状态
+    data = await feed(db, parse_kinds(kind, PUBLISH_KINDS), page, limit, cursor=cursor, with_total=with_total, public=False, is_published=is_published, q=q)
+    data["items"] = [{
+        "id": i["id"],
+        "kind": i["kind"],
+        "title": i["title"],
+        "section": SECTIONS[i["kind"]],
+        "is_published": i["is_published"],
+        "uploader_name": i["uploader_name"],
+        "created_at": i["created_at"],
+    } for i in data["items"]]
+    return data
 
 @router.put('/{kind}/{pid}/publish')
 def toggle_publish(kind: str, pid: int, is_published: bool, db: Session = Depends(get_db), user: User = Depends(get_admin_user)):
@@ -43,20 +52,24 @@ def toggle_publish(kind: str, pid: int, is_published: bool, db: Session = Depend
         raise HTTPException(status_code=400, detail="未知类型")
     if not p:
         raise HTTPException(status_code=404, detail="不存在")
-    setattr(p, 'is_published', is_published)
+    if kind == 'post':
+        set_post_published(db, p, is_published)
+    else:
+        set_life_published(db, p, is_published)
     db.commit()
+    sync_document(db, kind, p)
+    response_cache.invalidate_kind(kind)
     return {"success": True}
 
 @router.delete('/{kind}/{pid}')
 def delete(kind: str, pid: int, db: Session = Depends(get_db), user: User = Depends(get_admin_user)):
+    # 与前台删除共用服务层，统一清理索引、文件引用、标签与计数
     if kind == 'post':
-        p = db.query(Post).get(pid)
+        ok = delete_post(db, pid)
     elif kind == 'life':
-        p = db.query(LifePost).get(pid)
+        ok = delete_life(db, pid)
     else:
         raise HTTPException(status_code=400, detail="未知类型")
-    if not p:
+    if not ok:
         raise HTTPException(status_code=404, detail="不存在")
-    db.delete(p)
-    db.commit()
     return {"success": True}
\ No newline at end of file
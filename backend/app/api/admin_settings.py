@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from ..utils.database import get_db
 from ..models.setting import Setting
 from ..core.security import get_admin_user
+from ..utils.response_cache import response_cache, ALL
 
 router = APIRouter()
 
@@ -16,4 +17,6 @@ def set_settings(items: dict, db: Session = Depends(get_db), user = Depends(get_
         else:
             s.value = str(v)
     db.commit()
+    # 站点设置可能影响任意页面，清空全部响应缓存
+    response_cache.invalidate(ALL)
     return {"success": True}
\ No newline at end of file
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from ..utils.database import get_db
-from ..core.security import get_admin_user
+from ..core.security import get_admin_user, invalidate_user
 from ..core.config import settings
 from ..models.user import User
 
@@ -27,6 +27,7 @@ def delete_user(uid: int, db: Session = Depends(get_db), user: User = Depends(ge
         raise HTTPException(status_code=400, detail="不可删除管理员账户")
     db.delete(target)
     db.commit()
+    invalidate_user(uid)
     return {"success": True}
 
 @router.put('/{uid}/role')
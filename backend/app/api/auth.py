@@ -4,12 +4,12 @@ from ..utils.database import get_db
 from ..schemas.auth import LoginRequest, RegisterRequest, TokenResponse
 from ..services.auth_service import authenticate
 from ..core.config import settings
-from ..core.security import get_current_user
+from ..core.security import get_current_user, Principal
 from ..models.user import User
 from fastapi import HTTPException
 from datetime import datetime
 from ..models.signup_attempt import SignupAttempt
-import bcrypt
+from ..core.passwords import hash_password
 
 router = APIRouter()
 
@@ -21,7 +21,7 @@ def login(data: LoginRequest, db: Session = Depends(get_db)):
     return TokenResponse(access_token=token, expires_in=settings.jwt_expires)
 
 @router.get('/me')
-def me(user: User = Depends(get_current_user)):
+def me(user: Principal = Depends(get_current_user)):
     return {
         "id": user.id,
         "username": user.username,
@@ -69,7 +69,7 @@ def register(data: RegisterRequest, request: Request, db: Session = Depends(get_
     exists_email = db.query(User).filter(User.email == data.email).first()
     if exists_email:
         raise HTTPException(status_code=400, detail="邮箱已被使用")
-    password_hash = bcrypt.hashpw(data.password.encode(), bcrypt.gensalt()).decode()
+    password_hash = hash_password(data.password)
     u = User(username=data.username, email=data.email, password_hash=password_hash)
     db.add(u)
     db.commit()
@@ -1,11 +1,25 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from ..utils.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..utils.database import get_read_db
 from ..models.category import Category
+from ..utils.response_cache import response_cache
+from ..services.counter_service import totals
 
 router = APIRouter()
 
 @router.get('/')
-def list_categories(db: Session = Depends(get_db)):
-    items = db.query(Category).order_by(Category.sort_order.asc()).all()
-    return [{"id": c.id, "name": c.name, "slug": c.slug} for c in items]
\ No newline at end of file
+@response_cache.cached("categories:list", tags=("categories",))
+async def list_categories(db: AsyncSession = Depends(get_read_db)):
+    items = (await db.execute(select(Category).order_by(Category.sort_order.asc()))).scalars().all()
+    return [{"id": c.id, "name": c.name, "slug": c.slug} for c in items]
+
+@router.get('/summary')
+@response_cache.cached("categories:summary", tags=("categories", "posts", "projects", "life"))
+async def summary(db: AsyncSession = Depends(get_read_db)):
+    # 分类文章数与全站总数均读取冗余计数
+    rows = await db.execute(select(Category.id, Category.name, Category.slug, Category.post_count).order_by(Category.sort_order.asc()))
+    return {
+        "items": [{"id": cid, "name": name, "slug": slug, "post_count": n} for cid, name, slug, n in rows],
+        "totals": await totals(db),
+    }
\ No newline at end of file
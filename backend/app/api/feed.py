@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..utils.database import get_read_db
+from ..utils.response_cache import response_cache
+from ..services.feed_service import feed, parse_kinds
+
+router = APIRouter()
+
+@router.get('/')
+@response_cache.cached("feed", tags=("posts", "projects", "life"), vary=("kind", "page", "limit", "cursor", "with_total"))
+async def query(kind: str | None = None, page: int = Query(1, ge=1), limit: int = Query(10, ge=1, le=100), cursor: str | None = None, with_total: bool | None = None, db: AsyncSession = Depends(get_read_db)):
+    data = await feed(db, parse_kinds(kind), page, limit, cursor=cursor, with_total=with_total)
+    for item in data['items']:
+        item.pop('is_published')
+    return data
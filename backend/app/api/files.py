@@ -1,24 +1,57 @@
-from fastapi import APIRouter, UploadFile, File, Depends
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi.responses import FileResponse, StreamingResponse
+import json
 from sqlalchemy.orm import Session
-from ..services.file_service import save_upload, save_image_upload
-from ..services.tools_service import engine
+from ..services.file_service import save_upload, save_image_upload, acquire_file, get_blob, IMAGE_TYPES
+from ..core.config import settings
+from ..services.tools_service import engine, spool_uploads, iter_samples
 from ..core.security import get_admin_user, get_current_user
 from ..utils.database import get_db
 
 router = APIRouter()
 
 @router.post('/upload')
-def upload(file: UploadFile = File(...), user = Depends(get_admin_user)):
-    path, md5 = save_upload(file, 'assets')
+def upload(file: UploadFile = File(...), db: Session = Depends(get_db), user = Depends(get_admin_user)):
+    path, md5 = save_upload(db, file, 'assets')
+    acquire_file(db, path)
+    db.commit()
     return {"path": path, "md5": md5}
 
 @router.post('/scan')
 async def scan(file: UploadFile = File(...), user = Depends(get_current_user)):
     content = await file.read()
-    label, confidence = engine.predict(content)
+    label, confidence = await engine.scan(content)
     return {"label": label, "confidence": confidence}
 
+@router.post('/scan/batch')
+async def scan_batch(files: list[UploadFile] = File(...), user = Depends(get_current_user)):
+    spooled = await spool_uploads(files)
+
+    async def stream():
+        try:
+            async for item in engine.scan_many(iter_samples(spooled), settings.scan_batch_concurrency):
+                yield json.dumps(item, ensure_ascii=False) + "\n"
+        finally:
+            for _, f in spooled:
+                f.close()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
 @router.post('/upload-image')
-def upload_image(file: UploadFile = File(...), user = Depends(get_admin_user)):
-    path, md5 = save_image_upload(file)
-    return {"path": path, "md5": md5}
\ No newline at end of file
+def upload_image(file: UploadFile = File(...), db: Session = Depends(get_db), user = Depends(get_admin_user)):
+    path, md5 = save_image_upload(db, file)
+    acquire_file(db, path)
+    db.commit()
+    return {"path": path, "md5": md5}
+
+@router.get('/blob/{sha256}')
+def blob(sha256: str, db: Session = Depends(get_db)):
+    row = get_blob(db, sha256.lower())
+    if not row:
+        raise HTTPException(status_code=404, detail="文件不存在")
+    # 内容寻址的文件永不变化，可长期强缓存；类型由上传方声明，不可信：
+    # 仅白名单图片内联展示，其余一律作为附件下载，并禁止浏览器嗅探
+    headers = {"Cache-Control": "public, max-age=31536000, immutable", "ETag": f'"{row.sha256}"', "X-Content-Type-Options": "nosniff"}
+    if row.file_type in IMAGE_TYPES:
+        return FileResponse(row.file_path, media_type=row.file_type, headers=headers)
+    return FileResponse(row.file_path, media_type="application/octet-stream", filename=row.original_name, headers=headers)
\ No newline at end of file
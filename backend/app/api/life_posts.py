@@ -1,18 +1,24 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy.orm import Session
-from ..utils.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..utils.database import get_db, get_read_db
 from ..schemas.life import LifeCreate, LifeUpdate, LifeOut, LifeContentUpload, LifeContentResponse
-from ..services.life_service import create_life, update_life, get_life, list_life, delete_life, read_content
+from ..services.life_service import create_life, update_life, get_life, get_life_async, set_life_published, list_life, delete_life
 from ..core.security import get_admin_user
-import markdown
+from ..services.file_service import write_markdown, set_content_path
+from ..utils.http_cache import conditional
+from ..services.render_service import content_response_async, content_validators, render_cache
+from ..services.search_service import sync_life
+from ..utils.response_cache import response_cache
 
 router = APIRouter()
 
 @router.get('/')
-def query(page: int = 1, limit: int = 10, db: Session = Depends(get_db)):
-    data = list_life(db, page, limit)
-    items = [LifeOut.model_validate(i) for i in data['items']]
-    return {"items": items, "total": data['total']}
+@response_cache.cached("life:list", tags=("life",), vary=("page", "limit", "cursor", "with_total"))
+async def query(page: int = 1, limit: int = 10, cursor: str | None = None, with_total: bool | None = None, db: AsyncSession = Depends(get_read_db)):
+    data = await list_life(db, page, limit, cursor=cursor, with_total=with_total)
+    data['items'] = [LifeOut.model_validate(i) for i in data['items']]
+    return data
 
 @router.post('/')
 def create(data: LifeCreate, db: Session = Depends(get_db), user = Depends(get_admin_user)):
@@ -20,8 +26,8 @@ def create(data: LifeCreate, db: Session = Depends(get_db), user = Depends(get_a
     return LifeOut.model_validate(lp)
 
 @router.get('/{lid}')
-def detail(lid: int, db: Session = Depends(get_db)):
-    lp = get_life(db, lid)
+async def detail(lid: int, db: AsyncSession = Depends(get_read_db)):
+    lp = await get_life_async(db, lid)
     if not lp:
         return {}
     return LifeOut.model_validate(lp)
@@ -39,34 +45,34 @@ def remove(lid: int, db: Session = Depends(get_db), user = Depends(get_admin_use
     return {"success": ok}
 
 @router.get('/{lid}/content', response_model=LifeContentResponse)
-def content(lid: int, db: Session = Depends(get_db)):
-    text = read_content(db, lid)
-    html = markdown.markdown(text, extensions=["tables", "fenced_code"])
-    return {"content": html}
+async def content(lid: int, request: Request, response: Response, db: AsyncSession = Depends(get_read_db)):
+    lp = await get_life_async(db, lid)
+    if not lp:
+        return {"content": ""}
+    not_modified = conditional(request, response, content_validators(lp.content_path))
+    if not_modified:
+        return not_modified
+    return await content_response_async(lp.content_path)
 
 @router.post('/{lid}/markdown')
 def upload_markdown(lid: int, data: LifeContentUpload, db: Session = Depends(get_db), user = Depends(get_admin_user)):
     lp = get_life(db, lid)
     if not lp:
         return {}
-    from ..core.config import settings
-    import os
-    root = settings.upload_dir
-    d = os.path.join(root, 'markdown')
-    os.makedirs(d, exist_ok=True)
-    name = f"life_{lid}_{os.urandom(6).hex()}.md"
-    path = os.path.join(d, name)
-    with open(path, 'w', encoding='utf-8') as f:
-        f.write(data.content)
-    lp.content_path = path
+    path = write_markdown(db, f"life_{lid}.md", data.content)
+    render_cache.invalidate(lp.content_path)
+    set_content_path(db, lp, path)
     db.commit()
     db.refresh(lp)
+    sync_life(db, lp)
     return {"success": True}
 @router.put('/{lid}/publish')
 def toggle_publish(lid: int, is_published: bool, db: Session = Depends(get_db), user = Depends(get_admin_user)):
     lp = get_life(db, lid)
     if not lp:
         return {"success": False}
-    lp.is_published = is_published
+    set_life_published(db, lp, is_published)
     db.commit()
+    sync_life(db, lp)
+    response_cache.invalidate_kind("life")
     return {"success": True}
\ No newline at end of file
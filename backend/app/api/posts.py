@@ -1,50 +1,33 @@
-from fastapi import APIRouter, Depends, Body, Header, UploadFile, File, Form
+from fastapi import APIRouter, Depends, Body, Header, HTTPException, UploadFile, File, Form, Request, Response
 from sqlalchemy.orm import Session
-from ..utils.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..utils.database import get_db, get_read_db
 from ..schemas.post import PostCreate, PostUpdate, PostOut, PostContentResponse, PostAccessRequest, PostAccessToken, PostContentUpload
-from ..services.post_service import create_post, update_post, get_post, list_posts, delete_post, read_content, verify_post_password
+from ..services.post_service import create_post, update_post, get_post, get_post_async, set_post_published, list_posts, delete_post, latest_posts, serialize_listing
 from typing import Any
-from jose import jwt
 from ..core.config import settings
 from ..core.security import get_admin_user
-import markdown
-from ..services.file_service import save_markdown_upload
+from ..services.file_service import save_markdown_upload, write_markdown, set_content_path
+from ..utils.http_cache import conditional
+from ..services.render_service import content_response_async, content_validators, render_cache
+from ..services.search_service import sync_post
+from ..services.tag_service import split_tags
+from ..utils.response_cache import response_cache
+from ..services.access_service import check_access_token, grant_access, client_id
 
 router = APIRouter()
 
-def create_post_access_token(post_id: int):
-    return jwt.encode({"post_id": post_id}, settings.jwt_secret, algorithm=settings.jwt_algorithm)
-
 @router.get('/latest')
-def latest(limit: int = 6, db: Session = Depends(get_db)):
-    from ..models.post import Post
-    from ..models.tag import Tag
-    from ..models.post_tag import PostTag
-    q = db.query(Post).filter(Post.is_published == True).order_by(Post.created_at.desc()).limit(limit).all()
-    items = []
-    for p in q:
-        tag_ids = db.query(PostTag.tag_id).filter(PostTag.post_id == p.id).all()
-        ids = [tid for (tid,) in tag_ids]
-        tags = db.query(Tag).filter(Tag.id.in_(ids)).all() if ids else []
-        items.append({
-            "id": p.id,
-            "title": p.title,
-            "summary": p.summary,
-            "is_published": p.is_published,
-            "is_protected": p.is_protected,
-            "created_at": p.created_at,
-            "uploader_name": p.uploader_name,
-            "category": {"name": p.category.name} if p.category else None,
-            "author": {"username": p.author.username} if p.author else None,
-            "tags": [{"id": t.id, "name": t.name} for t in tags],
-        })
-    return items
+@response_cache.cached("posts:latest", tags=("posts", "tags"), vary=("limit",))
+async def latest(limit: int = 6, db: AsyncSession = Depends(get_read_db)):
+    return await serialize_listing(db, await latest_posts(db, limit))
 
 @router.get('/')
-def query(page: int = 1, limit: int = 10, tag: str | None = None, db: Session = Depends(get_db)):
-    data = list_posts(db, page, limit, tag=tag)
-    items = [PostOut.model_validate(i) for i in data["items"]]
-    return {"items": items, "total": data["total"]}
+@response_cache.cached("posts:list", tags=("posts", "tags"), vary=("page", "limit", "tag", "cursor", "with_total"))
+async def query(page: int = 1, limit: int = 10, tag: str | None = None, cursor: str | None = None, with_total: bool | None = None, db: AsyncSession = Depends(get_read_db)):
+    data = await list_posts(db, page, limit, tag=tag, cursor=cursor, with_total=with_total)
+    data["items"] = await serialize_listing(db, data["items"])
+    return data
 
 @router.post('/')
 def create(data: PostCreate, db: Session = Depends(get_db), user: Any = Depends(get_admin_user)):
@@ -52,8 +35,8 @@ def create(data: PostCreate, db: Session = Depends(get_db), user: Any = Depends(
     return PostOut.model_validate(post)
 
 @router.get('/{post_id}')
-def detail(post_id: int, db: Session = Depends(get_db)):
-    post = get_post(db, post_id)
+async def detail(post_id: int, db: AsyncSession = Depends(get_read_db)):
+    post = await get_post_async(db, post_id)
     if not post:
         return {}
     return PostOut.model_validate(post)
@@ -71,31 +54,30 @@ def remove(post_id: int, db: Session = Depends(get_db), user: Any = Depends(get_
     return {"success": ok}
 
 @router.get('/{post_id}/content', response_model=PostContentResponse)
-def content(post_id: int, db: Session = Depends(get_db), authorization: str | None = Header(None)):
-    post = get_post(db, post_id)
+async def content(post_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_read_db), authorization: str | None = Header(None)):
+    post = await get_post_async(db, post_id)
     if not post:
         return {"content": ""}
     if post.is_protected:
         if not authorization or not authorization.startswith("Bearer "):
-            return {"content": ""}
+            raise HTTPException(status_code=401, detail="缺少访问令牌")
         token = authorization.split(" ", 1)[1]
-        try:
-            payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
-            if payload.get("post_id") != post_id:
-                return {"content": ""}
-        except Exception:
-            return {"content": ""}
-    content_text = read_content(db, post_id)
-    html = markdown.markdown(content_text, extensions=["tables", "fenced_code"])
-    return {"content": html}
+        if not check_access_token(token, "post", post_id, post.password_hash):
+            raise HTTPException(status_code=403, detail="令牌无效或已过期")
+    not_modified = conditional(request, response, content_validators(post.content_path))
+    if not_modified:
+        return not_modified
+    return await content_response_async(post.content_path)
 
 @router.post('/{post_id}/access', response_model=PostAccessToken)
-def access(post_id: int, data: PostAccessRequest, db: Session = Depends(get_db)):
-    ok = verify_post_password(db, post_id, data.password)
-    if not ok:
+def access(post_id: int, data: PostAccessRequest, request: Request, db: Session = Depends(get_db)):
+    post = get_post(db, post_id)
+    if not post or not post.password_hash:
         return {"post_access_token": ""}
-    token = create_post_access_token(post_id)
-    return {"post_access_token": token}
+    token = grant_access("post", post_id, post.password_hash, data.password, client_id(request))
+    if not token:
+        return {"post_access_token": ""}
+    return {"post_access_token": token, "expires_in": settings.access_token_expires}
 
 @router.post('/{post_id}/markdown')
 def upload_markdown(post_id: int, data: PostContentUpload, db: Session = Depends(get_db), user: Any = Depends(get_admin_user)):
@@ -103,41 +85,31 @@ def upload_markdown(post_id: int, data: PostContentUpload, db: Session = Depends
     if not post:
         return {}
     updated = update_post(db, post_id, PostUpdate())
-    from ..services.post_service import create_post as cp
-    from ..core.config import settings
-    import os
-    upload_root = settings.upload_dir
-    markdown_dir = os.path.join(upload_root, "markdown")
-    os.makedirs(markdown_dir, exist_ok=True)
-    filename = f"post_{post_id}_{os.urandom(6).hex()}.md"
-    content_path = os.path.join(markdown_dir, filename)
-    with open(content_path, "w", encoding="utf-8") as f:
-        f.write(data.content)
-    post.content_path = content_path
+    content_path = write_markdown(db, f"post_{post_id}.md", data.content)
+    render_cache.invalidate(post.content_path)
+    set_content_path(db, post, content_path)
     db.commit()
     db.refresh(post)
+    sync_post(db, post)
     return {"success": True}
 
 @router.post('/upload')
 def upload_markdown_file(file: UploadFile = File(...), title: str | None = Form(None), is_published: bool = Form(True), is_protected: bool = Form(False), password: str | None = Form(None), tags: str | None = Form(None), uploader_name: str | None = Form(None), db: Session = Depends(get_db), user: Any = Depends(get_admin_user)):
-    path, md5 = save_markdown_upload(file)
-    tag_list = [t.strip() for t in (tags or '').split(',') if t.strip()] or None
+    path, md5 = save_markdown_upload(db, file)
+    tag_list = split_tags(tags) or None
     # 自动归类到“笔记分享”
     from ..models.category import Category
     cat = db.query(Category).filter(Category.slug == 'notes').first()
     cat_id = cat.id if cat else None
-    post = create_post(db, author_id=1, data=PostCreate(title=title or file.filename, summary=None, category_id=cat_id, is_published=is_published, is_protected=is_protected, password=password, tags=tag_list), content=None)
-    post.content_path = path
-    if uploader_name:
-        post.uploader_name = uploader_name
-    db.commit()
-    db.refresh(post)
+    post = create_post(db, author_id=1, data=PostCreate(title=title or file.filename, summary=None, category_id=cat_id, is_published=is_published, is_protected=is_protected, password=password, tags=tag_list), content=None, content_path=path, uploader_name=uploader_name or None)
     return {"id": post.id, "path": path, "md5": md5}
 @router.put('/{post_id}/publish')
 def toggle_publish(post_id: int, is_published: bool, db: Session = Depends(get_db), user: Any = Depends(get_admin_user)):
     post = get_post(db, post_id)
     if not post:
         return {"success": False}
-    post.is_published = is_published
+    set_post_published(db, post, is_published)
     db.commit()
+    sync_post(db, post)
+    response_cache.invalidate_kind("post")
     return {"success": True}
\ No newline at end of file
@@ -1,23 +1,29 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form
+from fastapi import APIRouter, Depends, UploadFile, File, Form, Request, Response
 from sqlalchemy.orm import Session
-from ..utils.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..utils.database import get_db, get_read_db
 from ..schemas.project import ProjectCreate, ProjectUpdate, ProjectOut, ProjectContentUpload, ProjectContentResponse
-from ..services.project_service import create_project, update_project, get_project, list_projects, delete_project, read_content
+from ..services.project_service import create_project, update_project, get_project, get_project_async, set_project_tags, list_projects, delete_project
 from ..core.security import get_admin_user
 from ..core.config import settings
-from jose import jwt
-import bcrypt
+from ..core.passwords import hash_password
 from fastapi import Header, HTTPException
-import markdown
-from ..services.file_service import save_markdown_upload
+from ..services.file_service import save_markdown_upload, write_markdown, set_content_path
+from ..utils.http_cache import conditional
+from ..services.render_service import content_response_async, content_validators, render_cache
+from ..services.search_service import sync_project
+from ..services.tag_service import split_tags
+from ..utils.response_cache import response_cache
+from ..services.access_service import check_access_token, grant_access, client_id
 
 router = APIRouter()
 
 @router.get('/')
-def query(page: int = 1, limit: int = 10, db: Session = Depends(get_db)):
-    data = list_projects(db, page, limit)
-    items = [ProjectOut.model_validate(i) for i in data['items']]
-    return {"items": items, "total": data['total']}
+@response_cache.cached("projects:list", tags=("projects",), vary=("page", "limit", "cursor", "with_total"))
+async def query(page: int = 1, limit: int = 10, cursor: str | None = None, with_total: bool | None = None, db: AsyncSession = Depends(get_read_db)):
+    data = await list_projects(db, page, limit, cursor=cursor, with_total=with_total)
+    data['items'] = [ProjectOut.model_validate(i) for i in data['items']]
+    return data
 
 @router.post('/')
 def create(data: ProjectCreate, db: Session = Depends(get_db), user = Depends(get_admin_user)):
@@ -25,8 +31,8 @@ def create(data: ProjectCreate, db: Session = Depends(get_db), user = Depends(ge
     return ProjectOut.model_validate(p)
 
 @router.get('/{pid}')
-def detail(pid: int, db: Session = Depends(get_db)):
-    p = get_project(db, pid)
+async def detail(pid: int, db: AsyncSession = Depends(get_read_db)):
+    p = await get_project_async(db, pid)
     if not p:
         return {}
     return ProjectOut.model_validate(p)
@@ -43,42 +49,33 @@ def remove(pid: int, db: Session = Depends(get_db), user = Depends(get_admin_use
     ok = delete_project(db, pid)
     return {"success": ok}
 
-def create_project_access_token(project_id: int):
-    return jwt.encode({"project_id": project_id}, settings.jwt_secret, algorithm=settings.jwt_algorithm)
-
 @router.get('/{pid}/content', response_model=ProjectContentResponse)
-def content(pid: int, authorization: str | None = Header(default=None), db: Session = Depends(get_db)):
-    p = get_project(db, pid)
+async def content(pid: int, request: Request, response: Response, authorization: str | None = Header(default=None), db: AsyncSession = Depends(get_read_db)):
+    p = await get_project_async(db, pid)
     if not p:
         raise HTTPException(status_code=404, detail="项目不存在")
     if getattr(p, 'is_protected', False):
         if not authorization or not authorization.lower().startswith('bearer '):
             raise HTTPException(status_code=401, detail="缺少访问令牌")
         token = authorization.split(' ', 1)[1]
-        payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
-        if payload.get('project_id') != pid:
-            raise HTTPException(status_code=403, detail="令牌不匹配")
-    text = read_content(db, pid)
-    html = markdown.markdown(text, extensions=["tables", "fenced_code"])
-    return {"content": html}
+        if not check_access_token(token, "project", pid, p.password_hash):
+            raise HTTPException(status_code=403, detail="令牌无效或已过期")
+    not_modified = conditional(request, response, content_validators(p.content_path))
+    if not_modified:
+        return not_modified
+    return await content_response_async(p.content_path)
 
 @router.post('/{pid}/markdown')
 def upload_markdown(pid: int, data: ProjectContentUpload, db: Session = Depends(get_db), user = Depends(get_admin_user)):
     p = get_project(db, pid)
     if not p:
         return {}
-    from ..core.config import settings
-    import os
-    root = settings.upload_dir
-    d = os.path.join(root, 'markdown')
-    os.makedirs(d, exist_ok=True)
-    name = f"project_{pid}_{os.urandom(6).hex()}.md"
-    path = os.path.join(d, name)
-    with open(path, 'w', encoding='utf-8') as f:
-        f.write(data.content)
-    p.content_path = path
+    path = write_markdown(db, f"project_{pid}.md", data.content)
+    render_cache.invalidate(p.content_path)
+    set_content_path(db, p, path)
     db.commit()
     db.refresh(p)
+    sync_project(db, p)
     return {"success": True}
 
 @router.post('/upload')
@@ -94,31 +91,31 @@ def upload_markdown_file(
     db: Session = Depends(get_db),
     user = Depends(get_admin_user)
 ):
-    path, md5 = save_markdown_upload(file)
+    path, md5 = save_markdown_upload(db, file)
     data = ProjectCreate(name=name or file.filename, description=description, demo_url=None, source_url=None, cover_image=None)
     p = create_project(db, author_id=1, data=data, content=None)
-    p.content_path = path
+    set_content_path(db, p, path)
     if uploader_name:
         p.uploader_name = uploader_name
     p.is_published = is_published
     if is_protected and password:
         p.is_protected = True
-        p.password_hash = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+        p.password_hash = hash_password(password)
     if tags:
-        try:
-            setattr(p, 'tags_text', tags)
-        except Exception:
-            pass
+        p.tags_text = tags
+        set_project_tags(db, p, split_tags(tags))
     db.commit()
     db.refresh(p)
+    sync_project(db, p)
+    response_cache.invalidate_kind("project")
     return {"id": p.id, "path": path, "md5": md5}
 
 @router.post('/{pid}/access')
-def project_access(pid: int, password: str = Form(...), db: Session = Depends(get_db)):
+def project_access(pid: int, request: Request, password: str = Form(...), db: Session = Depends(get_db)):
     p = get_project(db, pid)
     if not p or not getattr(p, 'is_protected', False) or not getattr(p, 'password_hash', None):
         raise HTTPException(status_code=404, detail="项目不可访问或未设置密码")
-    if not bcrypt.checkpw(password.encode(), p.password_hash.encode()):
+    token = grant_access("project", pid, p.password_hash, password, client_id(request))
+    if not token:
         raise HTTPException(status_code=401, detail="密码错误")
-    token = create_project_access_token(pid)
-    return {"project_access_token": token}
\ No newline at end of file
+    return {"project_access_token": token, "expires_in": settings.access_token_expires}
\ No newline at end of file
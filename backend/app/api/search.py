@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from ..utils.database import get_db
+from ..services.search_service import search as search_documents, KINDS
+
+router = APIRouter()
+
+@router.get('/')
+def search(q: str = Query(..., min_length=1, max_length=200), kind: str | None = None, limit: int = Query(20, ge=1, le=100), db: Session = Depends(get_db)):
+    if kind and kind not in KINDS:
+        return {"items": []}
+    return {"items": search_documents(db, q, kind, limit)}
\ No newline at end of file
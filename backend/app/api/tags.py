@@ -1,26 +1,47 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import select, func
-from ..utils.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from ..utils.database import get_read_db
 from ..models.tag import Tag
 from ..models.post import Post
 from ..models.post_tag import PostTag
+from ..models.project import Project
+from ..models.project_tag import ProjectTag
+from ..schemas.project import ProjectOut
+from ..services.post_service import listing_options, serialize_listing
+from ..utils.pagination import paginate_async
+from ..utils.response_cache import response_cache
 
 router = APIRouter()
 
+async def _tag(db: AsyncSession, slug: str):
+    return (await db.execute(select(Tag.id, Tag.post_count, Tag.project_count).where(Tag.slug == slug))).first()
+
 @router.get('/')
-def list_tags(db: Session = Depends(get_db)):
-    counts = db.query(PostTag.tag_id, func.count(PostTag.id)).group_by(PostTag.tag_id).all()
-    count_map = {tid: c for tid, c in counts}
-    tags = db.query(Tag).order_by(Tag.name.asc()).all()
-    return [{"id": t.id, "name": t.name, "slug": t.slug, "count": count_map.get(t.id, 0)} for t in tags]
+@response_cache.cached("tags:list", tags=("tags",))
+async def list_tags(db: AsyncSession = Depends(get_read_db)):
+    # 计数为随写操作维护的冗余列，按名称索引顺序读取即可
+    rows = await db.execute(select(Tag.id, Tag.name, Tag.slug, Tag.post_count, Tag.project_count).order_by(Tag.name.asc()))
+    return [{"id": tid, "name": name, "slug": slug, "count": posts + projects, "post_count": posts, "project_count": projects} for tid, name, slug, posts, projects in rows]
 
 @router.get('/{slug}/posts')
-def posts_by_tag(slug: str, page: int = 1, limit: int = 10, db: Session = Depends(get_db)):
-    tag = db.query(Tag).filter(Tag.slug == slug).first()
-    if not tag:
+@response_cache.cached("tags:posts", tags=("posts", "tags"), vary=("slug", "page", "limit", "cursor", "with_total"))
+async def posts_by_tag(slug: str, page: int = 1, limit: int = 10, cursor: str | None = None, with_total: bool | None = None, db: AsyncSession = Depends(get_read_db)):
+    tag = await _tag(db, slug)
+    if tag is None:
+        return {"items": [], "total": 0}
+    q = select(Post).join(PostTag, PostTag.post_id == Post.id).where(PostTag.tag_id == tag.id, Post.is_published == True)
+    data = await paginate_async(db, q, Post, page, limit, cursor, with_total, options=listing_options(), count=tag.post_count)
+    data["items"] = await serialize_listing(db, data["items"])
+    return data
+
+@router.get('/{slug}/projects')
+@response_cache.cached("tags:projects", tags=("projects", "tags"), vary=("slug", "page", "limit", "cursor", "with_total"))
+async def projects_by_tag(slug: str, page: int = 1, limit: int = 10, cursor: str | None = None, with_total: bool | None = None, db: AsyncSession = Depends(get_read_db)):
+    tag = await _tag(db, slug)
+    if tag is None:
         return {"items": [], "total": 0}
-    q = db.query(Post).join(PostTag, PostTag.post_id == Post.id).filter(PostTag.tag_id == tag.id).order_by(Post.created_at.desc())
-    total = q.count()
-    items = q.offset((page-1)*limit).limit(limit).all()
-    return {"items": [{"id": p.id, "title": p.title, "summary": p.summary, "is_published": p.is_published, "is_protected": p.is_protected} for p in items], "total": total}
\ No newline at end of file
+    q = select(Project).join(ProjectTag, ProjectTag.project_id == Project.id).where(ProjectTag.tag_id == tag.id)
+    data = await paginate_async(db, q, Project, page, limit, cursor, with_total, count=tag.project_count)
+    data["items"] = [ProjectOut.model_validate(p) for p in data["items"]]
+    return data
\ No newline at end of file
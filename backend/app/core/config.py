@@ -5,6 +5,21 @@ load_dotenv()
 
 class Settings:
     database_url: str = os.getenv("DATABASE_URL", "sqlite:///./blog.db")
+    # 只读副本，逗号分隔；为空时读请求走主库的只读连接
+    database_read_urls: list[str] = [u.strip() for u in os.getenv("DATABASE_READ_URLS", "").split(",") if u.strip()]
+    read_your_writes_seconds: float = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+    replica_retry_seconds: float = float(os.getenv("REPLICA_RETRY_SECONDS", "10"))
+    # 连接池按单个 worker 计；默认总量与 FastAPI 同步线程池（40）一致，避免线程等连接
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "30"))
+    db_pool_timeout: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    db_pool_recycle: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    # SQLite 连接参数，留空表示不设置该 PRAGMA
+    sqlite_journal_mode: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    sqlite_synchronous: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    sqlite_busy_timeout: str = os.getenv("SQLITE_BUSY_TIMEOUT", "5000")
+    sqlite_mmap_size: str = os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))
+    sqlite_cache_size: str = os.getenv("SQLITE_CACHE_SIZE", "-65536")
     jwt_secret: str = os.getenv("JWT_SECRET", "change_me")
     jwt_algorithm: str = "HS256"
     jwt_expires: int = int(os.getenv("JWT_EXPIRES", "3600"))
@@ -13,7 +28,39 @@ class Settings:
     admin_email: str = os.getenv("ADMIN_EMAIL", "admin@example.com")
     upload_dir: str = os.getenv("UPLOAD_DIR", "backend/app/static/uploads")
     model_path: str = os.getenv("MALWARE_MODEL_PATH", "")
+    access_token_expires: int = int(os.getenv("ACCESS_TOKEN_EXPIRES", "7200"))
+    access_max_failures: int = int(os.getenv("ACCESS_MAX_FAILURES", "10"))
+    access_failure_window: int = int(os.getenv("ACCESS_FAILURE_WINDOW", "300"))
+    access_max_total_failures: int = int(os.getenv("ACCESS_MAX_TOTAL_FAILURES", "200"))
+    access_grant_cache_size: int = int(os.getenv("ACCESS_GRANT_CACHE_SIZE", "4096"))
+    bcrypt_rounds: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    hash_workers: int = int(os.getenv("HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+    # 每个排队中的哈希都占着一个同步线程池线程（共 40 个）等结果，默认只留约两轮的量
+    hash_max_pending: int = int(os.getenv("HASH_MAX_PENDING", str(2 * max(1, hash_workers))))
+    auth_cache_ttl: float = float(os.getenv("AUTH_CACHE_TTL", "60"))
+    auth_cache_size: int = int(os.getenv("AUTH_CACHE_SIZE", "1024"))
     register_daily_limit: int = int(os.getenv("REGISTER_DAILY_LIMIT", "3"))
     register_cooldown_seconds: int = int(os.getenv("REGISTER_COOLDOWN_SECONDS", "60"))
+    max_upload_bytes: int = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+    file_gc_grace_seconds: int = int(os.getenv("FILE_GC_GRACE_SECONDS", "86400"))
+    scan_workers: int = int(os.getenv("SCAN_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+    scan_max_batch: int = int(os.getenv("SCAN_MAX_BATCH", "32"))
+    scan_max_wait_ms: float = float(os.getenv("SCAN_MAX_WAIT_MS", "5"))
+    scan_batch_concurrency: int = int(os.getenv("SCAN_BATCH_CONCURRENCY", "8"))
+    scan_batch_max_files: int = int(os.getenv("SCAN_BATCH_MAX_FILES", "500"))
+    scan_batch_max_bytes: int = int(os.getenv("SCAN_BATCH_MAX_BYTES", str(200 * 1024 * 1024)))
+    scan_warmup: bool = os.getenv("SCAN_WARMUP", "1") not in ("0", "false", "False")
+    scan_cache_entries: int = int(os.getenv("SCAN_CACHE_ENTRIES", "10000"))
+    scan_refresh_seconds: float = float(os.getenv("SCAN_REFRESH_SECONDS", "5"))
+    scan_cache_path: str = os.getenv("SCAN_CACHE_PATH", os.path.join(upload_dir, "cache", "scan_verdicts.db"))
+    response_cache_url: str = os.getenv("RESPONSE_CACHE_URL", "")
+    # 进程内缓存的失效只作用于本进程，默认有效期取短，限制多 worker 时其他进程的陈旧窗口
+    response_cache_ttl: int = int(os.getenv("RESPONSE_CACHE_TTL", "60" if response_cache_url else "5"))
+    # uvicorn / gunicorn 读取同名变量作为默认 worker 数
+    web_concurrency: int = int(os.getenv("WEB_CONCURRENCY", "1"))
+    response_cache_entries: int = int(os.getenv("RESPONSE_CACHE_ENTRIES", "2048"))
+    http_cache_max_age: int = int(os.getenv("HTTP_CACHE_MAX_AGE", "0"))
+    categories_cache_max_age: int = int(os.getenv("CATEGORIES_CACHE_MAX_AGE", "300"))
+    render_cache_bytes: int = int(os.getenv("RENDER_CACHE_BYTES", str(32 * 1024 * 1024)))
 
 settings = Settings()
\ No newline at end of file
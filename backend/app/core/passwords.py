@@ -0,0 +1,63 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import bcrypt
+from .config import settings
+
+class HashingBusy(RuntimeError):
+    pass
+
+def _hashpw(password: bytes, rounds: int):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds)).decode()
+
+def _checkpw(password: bytes, hashed: bytes):
+    return bcrypt.checkpw(password, hashed)
+
+class PasswordHasher:
+    """bcrypt 计算放到独立进程池执行，排队数超过上限时直接拒绝，避免挤占请求线程"""
+
+    def __init__(self, workers: int, max_pending: int, rounds: int):
+        self.workers = workers
+        self.rounds = rounds
+        self.slots = threading.BoundedSemaphore(max(1, max_pending))
+        self.pool = None
+        self.lock = threading.Lock()
+
+    def _get_pool(self):
+        with self.lock:
+            if self.pool is None:
+                self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self.pool
+
+    def _run(self, fn, *args, inline: bool = False):
+        if inline:
+            return fn(*args)
+        if not self.slots.acquire(blocking=False):
+            raise HashingBusy("password hashing queue is full")
+        try:
+            if self.workers <= 0:
+                return fn(*args)
+            return self._get_pool().submit(fn, *args).result()
+        finally:
+            self.slots.release()
+
+    def hash(self, password: str, inline: bool = False):
+        return self._run(_hashpw, password.encode(), self.rounds, inline=inline)
+
+    def verify(self, password: str, hashed: str, inline: bool = False):
+        return self._run(_checkpw, password.encode(), hashed.encode(), inline=inline)
+
+    def needs_rehash(self, hashed: str):
+        # bcrypt 哈希形如 $2b$12$...，成本因子与当前配置不一致时需要重新生成
+        try:
+            return int(hashed.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+hasher = PasswordHasher(settings.hash_workers, settings.hash_max_pending, settings.bcrypt_rounds)
+
+def hash_password(password: str, inline: bool = False):
+    return hasher.hash(password, inline=inline)
+
+def verify_password(password: str, hashed: str, inline: bool = False):
+    return hasher.verify(password, hashed, inline=inline)
@@ -1,24 +1,111 @@
+import threading
+import time
+from collections import OrderedDict
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
 from jose import jwt
 from ..core.config import settings
-from ..utils.database import get_db
+from ..utils.database import SessionLocal
 from ..models.user import User
 
 scheme = HTTPBearer(auto_error=True)
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(scheme), db: Session = Depends(get_db)):
+class Principal:
+    """已认证用户的只读快照，供鉴权依赖使用，不绑定数据库会话"""
+    __slots__ = ("id", "username", "email", "avatar_url", "created_at")
+
+    def __init__(self, user: User):
+        self.id = user.id
+        self.username = user.username
+        self.email = user.email
+        self.avatar_url = user.avatar_url
+        self.created_at = user.created_at
+
+    @property
+    def is_admin(self):
+        return self.username == settings.admin_username
+
+class PrincipalCache:
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, user_id: int):
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self.entries[user_id]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, principal: Principal):
+        if self.ttl <= 0:
+            return
+        with self.lock:
+            self.entries[principal.id] = (time.monotonic() + self.ttl, principal)
+            self.entries.move_to_end(principal.id)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+principal_cache = PrincipalCache(settings.auth_cache_ttl, settings.auth_cache_size)
+
+def invalidate_user(user_id: int):
+    # 删除用户或修改密码后调用，使缓存的身份立即失效
+    principal_cache.invalidate(user_id)
+
+def load_principal(user_id: int):
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+    # 仅在缓存未命中时才占用数据库连接
+    db = SessionLocal()
+    try:
+        user = db.query(User).get(user_id)
+        if not user:
+            return None
+        principal = Principal(user)
+    finally:
+        db.close()
+    principal_cache.put(principal)
+    return principal
+
+def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(scheme)):
     token = credentials.credentials
     try:
         payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
         user_id = int(payload.get("sub"))
     except Exception:
         raise HTTPException(status_code=401)
-    user = db.query(User).get(user_id)
+    user = load_principal(user_id)
     if not user:
         raise HTTPException(status_code=401)
     return user
 
-def get_admin_user(user: User = Depends(get_current_user)):
-    return user
\ No newline at end of file
+def get_admin_user(user: Principal = Depends(get_current_user)):
+    return user
@@ -1,7 +1,13 @@
-from fastapi import FastAPI
+import logging
+import os
+import time
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from .core.config import settings
-from .utils.database import Base, engine, SessionLocal
+from .utils.database import engine, SessionLocal, pool_status, dispose_engines, read_router
+from .utils.read_routing import ReadYourWritesMiddleware
+from .utils.migrations import run_migrations
 from .models.user import User
 from .models.category import Category
 from .models.tag import Tag
@@ -19,10 +25,47 @@ from .api.admin_settings import router as admin_settings_router
 from .api.admin_users import router as admin_users_router
 from .api.admin_publish import router as admin_publish_router
 from .api.tags import router as tags_router
-import bcrypt
+from .services.render_service import render_cache
+from .services.file_service import UploadTooLarge, collect_orphans
+from .services.tools_service import engine as scan_engine
+from .services.search_service import init_search
+from .core.security import invalidate_user, principal_cache
+from .core.passwords import HashingBusy, hash_password, verify_password, hasher
+from .api.search import router as search_router
+from .api.feed import router as feed_router
+from .utils.http_cache import HttpCacheMiddleware
+from .utils.response_cache import response_cache
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI()
 
+# 公开读接口的缓存策略（按路由前缀）；max-age 为 0 时每次都向服务端校验 ETag
+def public_cache(max_age: int):
+    return f"public, max-age={max_age}, must-revalidate" if max_age else "public, no-cache"
+
+PUBLIC_CACHE = public_cache(settings.http_cache_max_age)
+CACHE_POLICIES = {
+    "/api/posts": PUBLIC_CACHE,
+    "/api/projects": PUBLIC_CACHE,
+    "/api/life-posts": PUBLIC_CACHE,
+    "/api/feed": PUBLIC_CACHE,
+    "/api/tags": PUBLIC_CACHE,
+    "/api/categories": public_cache(settings.categories_cache_max_age),
+    "/api/categories/summary": PUBLIC_CACHE,
+    "/api/search": "public, no-cache",
+}
+
+app.add_middleware(HttpCacheMiddleware, policies=CACHE_POLICIES)
+app.add_middleware(ReadYourWritesMiddleware, router=read_router)
+DEFAULT_CATEGORIES = [
+    ("笔记分享", "notes", 1),
+    ("实战项目", "projects", 2),
+    ("个人生活", "life", 3)
+]
+
+startup_report = {}
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -31,57 +74,70 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(UploadTooLarge)
+def upload_too_large(request: Request, exc: UploadTooLarge):
+    return JSONResponse(status_code=413, content={"detail": "文件过大"})
+
+@app.exception_handler(HashingBusy)
+def hashing_busy(request: Request, exc: HashingBusy):
+    return JSONResponse(status_code=429, content={"detail": "服务繁忙，请稍后再试"}, headers={"Retry-After": "1"})
+
+def ensure_admin(db):
+    # 仅在配置的密码与现有哈希不符（或成本因子变化）时才重新哈希
+    admin = db.query(User).filter(User.username == settings.admin_username).first()
+    if not admin:
+        db.add(User(username=settings.admin_username, email=settings.admin_email, password_hash=hash_password(settings.admin_password, inline=True)))
+        db.commit()
+        return
+    changed = False
+    if admin.email != settings.admin_email:
+        admin.email = settings.admin_email
+        changed = True
+    if hasher.needs_rehash(admin.password_hash) or not verify_password(settings.admin_password, admin.password_hash, inline=True):
+        admin.password_hash = hash_password(settings.admin_password, inline=True)
+        changed = True
+    if changed:
+        db.commit()
+        invalidate_user(admin.id)
+
+def seed_categories(db):
+    slugs = [slug for _, slug, _ in DEFAULT_CATEGORIES]
+    existing = {slug for (slug,) in db.query(Category.slug).filter(Category.slug.in_(slugs))}
+    missing = [Category(name=name, slug=slug, sort_order=order) for name, slug, order in DEFAULT_CATEGORIES if slug not in existing]
+    if missing:
+        db.add_all(missing)
+        db.commit()
+
 @app.on_event("startup")
 def on_startup():
-    Base.metadata.create_all(bind=engine)
+    timings = {}
+    started = last = time.perf_counter()
+
+    def step(name):
+        nonlocal last
+        now = time.perf_counter()
+        timings[name] = round((now - last) * 1000, 1)
+        last = now
+
+    migrated = run_migrations(engine)
+    step("migrations")
     db = SessionLocal()
     try:
-        admin = db.query(User).filter(User.username == settings.admin_username).first()
-        password_hash = bcrypt.hashpw(settings.admin_password.encode(), bcrypt.gensalt()).decode()
-        if not admin:
-            db.add(User(username=settings.admin_username, email=settings.admin_email, password_hash=password_hash))
-            db.commit()
-        else:
-            admin.email = settings.admin_email
-            admin.password_hash = password_hash
-            db.commit()
-        default_cats = [
-            ("笔记分享", "notes", 1),
-            ("实战项目", "projects", 2),
-            ("个人生活", "life", 3)
-        ]
-        for name, slug, order in default_cats:
-            if not db.query(Category).filter(Category.slug == slug).first():
-                db.add(Category(name=name, slug=slug, sort_order=order))
-        db.commit()
-
-        # 兼容数据库列：为 posts 添加 uploader_name 列（若不存在）
-        try:
-            from sqlalchemy import text
-            conn = engine.connect()
-            # SQLite 列检测
-            cols = conn.execute(text("PRAGMA table_info(posts)")).fetchall()
-            names = [c[1] for c in cols]
-            if 'uploader_name' not in names:
-                conn.execute(text("ALTER TABLE posts ADD COLUMN uploader_name VARCHAR(100)"))
-            # projects 列检测
-            cols2 = conn.execute(text("PRAGMA table_info(projects)")).fetchall()
-            names2 = [c[1] for c in cols2]
-            if 'uploader_name' not in names2:
-                conn.execute(text("ALTER TABLE projects ADD COLUMN uploader_name VARCHAR(100)"))
-            if 'is_published' not in names2:
-                conn.execute(text("ALTER TABLE projects ADD COLUMN is_published BOOLEAN DEFAULT 1"))
-            if 'is_protected' not in names2:
-                conn.execute(text("ALTER TABLE projects ADD COLUMN is_protected BOOLEAN DEFAULT 0"))
-            if 'password_hash' not in names2:
-                conn.execute(text("ALTER TABLE projects ADD COLUMN password_hash VARCHAR(255)"))
-            if 'tags_text' not in names2:
-                conn.execute(text("ALTER TABLE projects ADD COLUMN tags_text VARCHAR(255)"))
-            conn.close()
-        except Exception:
-            pass
+        ensure_admin(db)
+        step("admin")
+        seed_categories(db)
+        step("categories")
+        init_search(engine, db)
+        step("search")
+        collect_orphans(db, settings.file_gc_grace_seconds)
+        step("files")
     finally:
         db.close()
+    if settings.scan_warmup:
+        scan_engine.warm_up()
+    total = round((time.perf_counter() - started) * 1000, 1)
+    startup_report.update({"pid": os.getpid(), "total_ms": total, "steps_ms": timings, "migrated": migrated})
+    logger.info("startup finished in %.1fms (pid %d): %s", total, os.getpid(), ", ".join(f"{k}={v}ms" for k, v in timings.items()))
 
 app.include_router(auth_router, prefix="/api/auth")
 app.include_router(posts_router, prefix="/api/posts")
@@ -94,7 +150,17 @@ app.include_router(admin_users_router, prefix="/api/admin/users")
 app.include_router(admin_publish_router, prefix="/api/admin/publish")
 app.include_router(categories_router, prefix="/api/categories")
 app.include_router(tags_router, prefix="/api/tags")
+app.include_router(search_router, prefix="/api/search")
+app.include_router(feed_router, prefix="/api/feed")
+
+@app.on_event("startup")
+async def check_replicas():
+    await read_router.check()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await dispose_engines()
 
 @app.get("/api/health")
 def health():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok", "render_cache": render_cache.stats(), "scanner": scan_engine.metrics(), "auth_cache": principal_cache.stats(), "startup": startup_report, "response_cache": response_cache.stats(), "db_pools": pool_status(), "read_routing": read_router.stats()}
\ No newline at end of file
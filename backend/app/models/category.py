@@ -9,4 +9,6 @@ class Category(Base):
     slug = Column(String(100), unique=True, index=True, nullable=False)
     description = Column(String(255), nullable=True)
     sort_order = Column(Integer, default=0)
-    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.utcnow)
+    # 已发布文章数，由 counter_service 维护
+    post_count = Column(Integer, nullable=False, default=0)
\ No newline at end of file
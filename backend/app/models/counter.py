@@ -0,0 +1,7 @@
+from sqlalchemy import Column, Integer, String
+from ..utils.database import Base
+
+class ContentCounter(Base):
+    __tablename__ = "content_counters"
+    name = Column(String(50), primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, BigInteger
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, BigInteger, Index
 from datetime import datetime
 from ..utils.database import Base
 
@@ -7,9 +7,14 @@ class File(Base):
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String(255), nullable=False)
     original_name = Column(String(255), nullable=False)
-    file_path = Column(String(500), nullable=False)
+    file_path = Column(String(500), nullable=False, index=True)
     file_type = Column(String(100), nullable=True)
     file_size = Column(BigInteger, nullable=True)
     md5_hash = Column(String(32), nullable=True)
+    sha256 = Column(String(64), index=True, nullable=True)
+    # 上传子目录（markdown / images / assets），内容去重只在同一子目录内进行
+    subdir = Column(String(20), nullable=True)
+    ref_count = Column(Integer, default=0)
     is_safe = Column(Boolean, default=True)
-    uploaded_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    uploaded_at = Column(DateTime, default=datetime.utcnow)
+    __table_args__ = (Index('ux_files_subdir_sha256', 'subdir', 'sha256', unique=True),)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Index
 from datetime import datetime
 from ..utils.database import Base
 
@@ -10,4 +10,8 @@ class LifePost(Base):
     content_path = Column(String(500), nullable=True)
     is_published = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    __table_args__ = (
+        Index('ix_life_posts_created', 'created_at', 'id'),
+        Index('ix_life_posts_published_created', 'is_published', 'created_at', 'id'),
+    )
\ No newline at end of file
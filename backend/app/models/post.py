@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..utils.database import Base
@@ -20,4 +20,10 @@ class Post(Base):
     updated_at = Column(DateTime, default=datetime.utcnow)
     uploader_name = Column(String(100), nullable=True)
     author = relationship("User")
-    category = relationship("Category")
\ No newline at end of file
+    category = relationship("Category")
+    __table_args__ = (
+        Index('ix_posts_created', 'created_at', 'id'),
+        Index('ix_posts_published_created', 'is_published', 'created_at', 'id'),
+        Index('ix_posts_category_published_created', 'category_id', 'is_published', 'created_at'),
+        Index('ix_posts_author_id', 'author_id'),
+    )
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, ForeignKey, UniqueConstraint, Index
 from ..utils.database import Base
 
 class PostTag(Base):
@@ -6,4 +6,7 @@ class PostTag(Base):
     id = Column(Integer, primary_key=True, index=True)
     post_id = Column(Integer, ForeignKey('posts.id', ondelete='CASCADE'), nullable=False)
     tag_id = Column(Integer, ForeignKey('tags.id', ondelete='CASCADE'), nullable=False)
-    __table_args__ = (UniqueConstraint('post_id', 'tag_id', name='uq_post_tag'),)
\ No newline at end of file
+    __table_args__ = (
+        UniqueConstraint('post_id', 'tag_id', name='uq_post_tag'),
+        Index('ix_post_tags_tag_post', 'tag_id', 'post_id'),
+    )
\ No newline at end of file
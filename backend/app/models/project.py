@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..utils.database import Base
@@ -20,4 +20,8 @@ class Project(Base):
     uploader_name = Column(String(100), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow)
-    author = relationship("User")
\ No newline at end of file
+    author = relationship("User")
+    __table_args__ = (
+        Index('ix_projects_created', 'created_at', 'id'),
+        Index('ix_projects_published_created', 'is_published', 'created_at', 'id'),
+    )
\ No newline at end of file
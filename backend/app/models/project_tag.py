@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, ForeignKey, UniqueConstraint, Index
+from ..utils.database import Base
+
+class ProjectTag(Base):
+    __tablename__ = 'project_tags'
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey('projects.id', ondelete='CASCADE'), nullable=False)
+    tag_id = Column(Integer, ForeignKey('tags.id', ondelete='CASCADE'), nullable=False)
+    __table_args__ = (
+        UniqueConstraint('project_id', 'tag_id', name='uq_project_tag'),
+        Index('ix_project_tags_tag_project', 'tag_id', 'project_id'),
+    )
@@ -7,4 +7,7 @@ class Tag(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), unique=True, index=True, nullable=False)
     slug = Column(String(100), unique=True, index=True, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.utcnow)
+    # 冗余计数，由 counter_service 随写操作维护：已发布文章数、关联项目数
+    post_count = Column(Integer, nullable=False, default=0)
+    project_count = Column(Integer, nullable=False, default=0)
\ No newline at end of file
@@ -24,4 +24,7 @@ class LifeContentUpload(BaseModel):
     content: str
 
 class LifeContentResponse(BaseModel):
-    content: str
\ No newline at end of file
+    content: str
+    toc: Optional[str] = None
+    word_count: Optional[int] = None
+    reading_time: Optional[int] = None
\ No newline at end of file
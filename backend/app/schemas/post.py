@@ -31,12 +31,16 @@ class PostOut(BaseModel):
 
 class PostContentResponse(BaseModel):
     content: str
+    toc: Optional[str] = None
+    word_count: Optional[int] = None
+    reading_time: Optional[int] = None
 
 class PostAccessRequest(BaseModel):
     password: str
 
 class PostAccessToken(BaseModel):
     post_access_token: str
+    expires_in: int = 0
 
 class PostContentUpload(BaseModel):
     content: str
\ No newline at end of file
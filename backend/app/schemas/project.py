@@ -27,4 +27,7 @@ class ProjectContentUpload(BaseModel):
     content: str
 
 class ProjectContentResponse(BaseModel):
-    content: str
\ No newline at end of file
+    content: str
+    toc: Optional[str] = None
+    word_count: Optional[int] = None
+    reading_time: Optional[int] = None
\ No newline at end of file
@@ -0,0 +1,109 @@
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from fastapi import HTTPException, Request
+from jose import jwt
+from ..core.config import settings
+from ..core.passwords import verify_password
+
+# 令牌中的资源声明名，沿用旧令牌的字段
+CLAIMS = {"post": "post_id", "project": "project_id"}
+
+def password_version(password_hash: str | None):
+    # 密码哈希的摘要；修改密码后版本变化，旧令牌与缓存的授权随之失效
+    return hashlib.sha256((password_hash or "").encode()).hexdigest()[:16]
+
+def client_id(request: Request):
+    host = request.client.host if request.client else "unknown"
+    agent = request.headers.get("user-agent", "")
+    return hashlib.sha256(f"{host}|{agent}".encode()).hexdigest()[:16]
+
+def _password_digest(password: str):
+    return hmac.new(settings.jwt_secret.encode(), password.encode(), hashlib.sha256).hexdigest()
+
+class GrantCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.grants = OrderedDict()
+        self.failures = OrderedDict()
+        self.lock = threading.Lock()
+
+    def has(self, key):
+        with self.lock:
+            expires = self.grants.get(key)
+            if expires is None:
+                return False
+            if expires < time.monotonic():
+                del self.grants[key]
+                return False
+            self.grants.move_to_end(key)
+            return True
+
+    def add(self, key, ttl: float):
+        with self.lock:
+            self.grants[key] = time.monotonic() + ttl
+            self.grants.move_to_end(key)
+            while len(self.grants) > self.max_entries:
+                self.grants.popitem(last=False)
+
+    def locked(self, target, limit: int):
+        with self.lock:
+            entry = self.failures.get(target)
+            if entry is None:
+                return False
+            start, count = entry
+            if time.monotonic() - start > settings.access_failure_window:
+                del self.failures[target]
+                return False
+            return count >= limit
+
+    def fail(self, target):
+        with self.lock:
+            now = time.monotonic()
+            start, count = self.failures.get(target, (now, 0))
+            if now - start > settings.access_failure_window:
+                start, count = now, 0
+            self.failures[target] = (start, count + 1)
+            self.failures.move_to_end(target)
+            while len(self.failures) > self.max_entries:
+                self.failures.popitem(last=False)
+
+    def succeed(self, target):
+        with self.lock:
+            self.failures.pop(target, None)
+
+grants = GrantCache(settings.access_grant_cache_size)
+
+def create_access_token(kind: str, ref_id: int, password_hash: str | None):
+    payload = {
+        CLAIMS[kind]: ref_id,
+        "pwv": password_version(password_hash),
+        "exp": datetime.utcnow() + timedelta(seconds=settings.access_token_expires),
+    }
+    return jwt.encode(payload, settings.jwt_secret, algorithm=settings.jwt_algorithm)
+
+def check_access_token(token: str, kind: str, ref_id: int, password_hash: str | None):
+    try:
+        payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
+    except Exception:
+        return False
+    return payload.get(CLAIMS[kind]) == ref_id and payload.get("pwv") == password_version(password_hash)
+
+def grant_access(kind: str, ref_id: int, password_hash: str, password: str, client: str):
+    """校验访问密码并签发令牌，密码错误返回 None；同一客户端重复提交正确密码时不再运行 bcrypt"""
+    key = (kind, ref_id, password_version(password_hash), client, _password_digest(password))
+    if not grants.has(key):
+        # 按客户端计数，避免他人故意输错把正常访客锁在门外；资源级上限远高于单客户端，只挡大规模爆破
+        target, overall = (kind, ref_id, client), (kind, ref_id)
+        if grants.locked(target, settings.access_max_failures) or grants.locked(overall, settings.access_max_total_failures):
+            raise HTTPException(status_code=429, detail="尝试次数过多，请稍后再试")
+        if not verify_password(password, password_hash):
+            grants.fail(target)
+            grants.fail(overall)
+            return None
+        grants.succeed(target)
+        grants.add(key, settings.access_token_expires)
+    return create_access_token(kind, ref_id, password_hash)
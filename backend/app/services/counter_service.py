@@ -0,0 +1,95 @@
+from collections import Counter as Delta
+from sqlalchemy import select, update, func, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from ..models.category import Category
+from ..models.counter import ContentCounter
+from ..models.life_post import LifePost
+from ..models.post import Post
+from ..models.post_tag import PostTag
+from ..models.project import Project
+from ..models.project_tag import ProjectTag
+from ..models.tag import Tag
+
+# 全站总数：已发布文章、全部项目、已发布随笔（与各列表接口的可见范围一致）
+POSTS, PROJECTS, LIFE = "posts", "projects", "life"
+TOTALS = (POSTS, PROJECTS, LIFE)
+
+def _tag_ids(db: Session, model, column, owner_id: int):
+    return frozenset(tid for (tid,) in db.query(model.tag_id).filter(column == owner_id))
+
+def post_state(db: Session, post):
+    """文章计数相关的状态快照 (是否发布, 分类, 标签 id 集合)；文章不存在时为 None"""
+    if post is None or post.id is None:
+        return None
+    return (bool(post.is_published), post.category_id, _tag_ids(db, PostTag, PostTag.post_id, post.id))
+
+def project_state(db: Session, project):
+    """项目计数相关的状态快照（标签 id 集合）；项目不存在时为 None"""
+    if project is None or project.id is None:
+        return None
+    return _tag_ids(db, ProjectTag, ProjectTag.project_id, project.id)
+
+def _bump_rows(db: Session, column, deltas: Delta):
+    # 按增量分组，每组一条 UPDATE ... SET n = n + d
+    groups = {}
+    for key, d in deltas.items():
+        if d:
+            groups.setdefault(d, []).append(key)
+    model = column.class_
+    for d, ids in groups.items():
+        db.execute(update(model).where(model.id.in_(ids)).values({column.key: column + d}))
+
+def bump_total(db: Session, name: str, delta: int):
+    if delta:
+        db.execute(update(ContentCounter).where(ContentCounter.name == name).values(value=ContentCounter.value + delta))
+
+def apply_post_change(db: Session, before, after):
+    """按前后快照的差异更新分类、标签与总数计数；未发布的文章不计入。不提交事务"""
+    def visible(state):
+        return state if state and state[0] else (False, None, frozenset())
+    b_pub, b_cat, b_tags = visible(before)
+    a_pub, a_cat, a_tags = visible(after)
+    bump_total(db, POSTS, int(a_pub) - int(b_pub))
+    categories = Delta()
+    if b_cat is not None:
+        categories[b_cat] -= 1
+    if a_cat is not None:
+        categories[a_cat] += 1
+    _bump_rows(db, Category.post_count, categories)
+    tags = Delta({tid: -1 for tid in b_tags - a_tags})
+    tags.update({tid: 1 for tid in a_tags - b_tags})
+    _bump_rows(db, Tag.post_count, tags)
+
+def apply_project_change(db: Session, before, after):
+    bump_total(db, PROJECTS, (after is not None) - (before is not None))
+    b_tags, a_tags = before or frozenset(), after or frozenset()
+    tags = Delta({tid: -1 for tid in b_tags - a_tags})
+    tags.update({tid: 1 for tid in a_tags - b_tags})
+    _bump_rows(db, Tag.project_count, tags)
+
+def apply_life_change(db: Session, was_published: bool, is_published: bool):
+    bump_total(db, LIFE, int(bool(is_published)) - int(bool(was_published)))
+
+def recount(db: Session):
+    """按明细表全量重算所有计数（迁移与修复用）；不提交事务"""
+    published_posts = select(func.count()).select_from(PostTag).join(Post, Post.id == PostTag.post_id).where(PostTag.tag_id == Tag.id, Post.is_published == True).scalar_subquery()
+    linked_projects = select(func.count()).select_from(ProjectTag).where(ProjectTag.tag_id == Tag.id).scalar_subquery()
+    db.execute(update(Tag).values(post_count=published_posts, project_count=linked_projects))
+    category_posts = select(func.count()).select_from(Post).where(Post.category_id == Category.id, Post.is_published == True).scalar_subquery()
+    db.execute(update(Category).values(post_count=category_posts))
+    totals = {
+        POSTS: db.query(func.count(Post.id)).filter(Post.is_published == True).scalar(),
+        PROJECTS: db.query(func.count(Project.id)).scalar(),
+        LIFE: db.query(func.count(LifePost.id)).filter(LifePost.is_published == True).scalar(),
+    }
+    db.query(ContentCounter).delete(synchronize_session=False)
+    db.execute(insert(ContentCounter), [{"name": k, "value": v} for k, v in totals.items()])
+    return totals
+
+async def total(db: AsyncSession, name: str):
+    return (await db.execute(select(ContentCounter.value).where(ContentCounter.name == name))).scalar() or 0
+
+async def totals(db: AsyncSession):
+    values = dict((await db.execute(select(ContentCounter.name, ContentCounter.value))).all())
+    return {name: values.get(name, 0) for name in TOTALS}
\ No newline at end of file
@@ -0,0 +1,111 @@
+import base64
+from datetime import datetime
+from fastapi import HTTPException
+from sqlalchemy import select, literal, func, or_, and_, union_all, Boolean, String
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models.life_post import LifePost
+from ..models.post import Post
+from ..models.project import Project
+from . import counter_service
+
+KINDS = ("post", "project", "life")
+SECTIONS = {"post": "笔记分享", "project": "实战项目", "life": "个人生活"}
+COUNTERS = {"post": counter_service.POSTS, "project": counter_service.PROJECTS, "life": counter_service.LIFE}
+
+def _columns(kind: str):
+    # 三类内容统一成同一组列，顺序需一致以便 UNION ALL
+    if kind == "post":
+        return Post, (Post.title, Post.summary, Post.is_protected, Post.uploader_name)
+    if kind == "project":
+        return Project, (Project.name, Project.description, Project.is_protected, Project.uploader_name)
+    return LifePost, (LifePost.title, LifePost.summary, literal(False, Boolean), literal(None, String))
+
+def _public(model):
+    # 与各列表接口的可见范围一致：已发布文章、全部项目、已发布随笔
+    return None if model is Project else model.is_published == True
+
+def parse_kinds(kind: str | None, allowed=KINDS):
+    if not kind:
+        return allowed
+    wanted = {s.strip() for s in kind.split(",") if s.strip()}
+    if not wanted or not wanted <= set(allowed):
+        raise HTTPException(status_code=400, detail="未知类型")
+    return tuple(k for k in allowed if k in wanted)
+
+def encode_cursor(created_at: datetime, kind: str, item_id: int):
+    raw = f"{created_at.isoformat()}|{kind}|{item_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, kind, item_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|", 2)
+        if kind not in KINDS:
+            raise ValueError(kind)
+        return datetime.fromisoformat(created_at), kind, int(item_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="无效的分页游标")
+
+def _filters(kind: str, public: bool, is_published: bool | None, q: str | None):
+    model, (title, *_) = _columns(kind)
+    conds = []
+    if public and _public(model) is not None:
+        conds.append(_public(model))
+    if is_published is not None:
+        conds.append(model.is_published == is_published)
+    if q:
+        conds.append(title.contains(q, autoescape=True))
+    return conds
+
+def _after(kind: str, model, cursor):
+    # 全局按 (created_at, kind, id) 倒序；kind 在分支内为常量，比较可在 Python 侧展开，
+    # 每个分支只剩 (created_at, id) 条件，仍能走 (is_published, created_at, id) 索引
+    created_at, ckind, cid = cursor
+    if kind < ckind:
+        return model.created_at <= created_at
+    if kind > ckind:
+        return model.created_at < created_at
+    return or_(model.created_at < created_at, and_(model.created_at == created_at, model.id < cid))
+
+def _branch(kind: str, conds, cursor, n: int):
+    model, (title, summary, protected, uploader) = _columns(kind)
+    stmt = select(
+        literal(kind, String).label("kind"), model.id.label("id"), title.label("title"), summary.label("summary"),
+        model.created_at.label("created_at"), model.is_published.label("is_published"),
+        protected.label("is_protected"), uploader.label("uploader_name"),
+    ).where(*conds)
+    if cursor:
+        stmt = stmt.where(_after(kind, model, cursor))
+    # 每个分支先各自排序截断，外层只需归并至多 n * 分支数 行
+    return select(stmt.order_by(model.created_at.desc(), model.id.desc()).limit(n).subquery())
+
+def feed_statement(kinds, offset: int, limit: int, cursor=None, public: bool = True, is_published: bool | None = None, q: str | None = None):
+    n = offset + limit
+    branches = [_branch(k, _filters(k, public, is_published, q), cursor, n) for k in kinds]
+    feed = (union_all(*branches) if len(branches) > 1 else branches[0]).subquery()
+    return select(feed).order_by(feed.c.created_at.desc(), feed.c.kind.desc(), feed.c.id.desc()).offset(offset).limit(limit)
+
+async def _count(db: AsyncSession, kinds, public: bool, is_published: bool | None, q: str | None):
+    if public and is_published is None and not q:
+        # 公开范围与冗余计数一致，直接累加
+        return sum([await counter_service.total(db, COUNTERS[k]) for k in kinds])
+    counts = [
+        select(func.count()).select_from(_columns(k)[0]).where(*_filters(k, public, is_published, q)).scalar_subquery()
+        for k in kinds
+    ]
+    return sum((await db.execute(select(*counts))).one())
+
+async def feed(db: AsyncSession, kinds=KINDS, page: int = 1, limit: int = 10, cursor: str | None = None,
+               with_total: bool | None = None, public: bool = True, is_published: bool | None = None, q: str | None = None):
+    """文章、项目、生活随笔按时间倒序合并的一条流，一次 UNION ALL 查询；分页语义同 paginate_async"""
+    if cursor is None:
+        total = await _count(db, kinds, public, is_published, q) if with_total is not False else None
+        rows = (await db.execute(feed_statement(kinds, (page - 1) * limit, limit, public=public, is_published=is_published, q=q))).mappings().all()
+        return {"items": [dict(r) for r in rows], "total": total}
+    total = await _count(db, kinds, public, is_published, q) if with_total else None
+    after = decode_cursor(cursor) if cursor else None
+    rows = (await db.execute(feed_statement(kinds, 0, limit + 1, after, public=public, is_published=is_published, q=q))).mappings().all()
+    items = [dict(r) for r in rows[:limit]]
+    last = items[-1] if len(rows) > limit else None
+    next_cursor = encode_cursor(last["created_at"], last["kind"], last["id"]) if last else None
+    return {"items": items, "total": total, "next_cursor": next_cursor}
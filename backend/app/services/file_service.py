@@ -1,33 +1,213 @@
 import hashlib
 import os
+import tempfile
+from datetime import datetime, timedelta
+from sqlalchemy import event, select, insert
+from sqlalchemy.dialects import sqlite, postgresql
+from sqlalchemy.orm import Session
 from ..core.config import settings
+from ..models.file import File
+from ..models.post import Post
+from ..models.project import Project
+from ..models.life_post import LifePost
+from .render_service import prerender, load_artifact, artifact_paths, render_cache
 
 IMAGE_TYPES = {"image/png", "image/jpeg", "image/gif", "image/webp"}
+# 可经 /api/files/blob 公开读取的子目录；markdown 含受保护正文，只能走内容接口
+PUBLIC_SUBDIRS = ("images", "assets")
+CHUNK_SIZE = 1024 * 1024
+# 会话内待删除的文件，事务提交后才真正删除，回滚则保留
+PENDING_REMOVALS = "pending_file_removals"
+
+class UploadTooLarge(ValueError):
+    pass
 
 def _safe_filename(original: str):
     base = os.path.basename(original)
     return base.replace(" ", "_")
 
-def save_upload(file, subdir: str):
-    root = settings.upload_dir
-    target_dir = os.path.join(root, subdir)
+def blob_path(subdir: str, sha256: str, ext: str):
+    # 按哈希前缀两级分片：<subdir>/ab/cd/<sha256><ext>
+    return os.path.join(settings.upload_dir, subdir, sha256[:2], sha256[2:4], sha256 + ext)
+
+def _extension(filename: str | None):
+    ext = os.path.splitext(filename or "")[1].lower()
+    return ext if len(ext) <= 10 else ""
+
+def _schedule_removal(db: Session, path: str):
+    db.info.setdefault(PENDING_REMOVALS, set()).add(path)
+
+def _keep(db: Session, path: str):
+    # 同一事务内先释放又重新写入同一 blob 时，取消待删除
+    db.info.get(PENDING_REMOVALS, set()).discard(path)
+
+@event.listens_for(Session, "after_commit")
+def _remove_released(session):
+    for path in session.info.pop(PENDING_REMOVALS, ()):
+        render_cache.invalidate(path)
+        for p in (path, *artifact_paths(path)):
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+
+@event.listens_for(Session, "after_rollback")
+def _discard_released(session):
+    session.info.pop(PENDING_REMOVALS, None)
+
+def _insert_ignore(db: Session):
+    # 并发上传相同内容时后到的一方直接忽略，不抛 IntegrityError，也就不必回滚调用方的事务
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        return sqlite.insert(File).on_conflict_do_nothing()
+    if dialect == "postgresql":
+        return postgresql.insert(File).on_conflict_do_nothing()
+    return insert(File).prefix_with("IGNORE", dialect="mysql")
+
+def _find_blob(db: Session, subdir: str, sha256: str):
+    return db.query(File).filter(File.subdir == subdir, File.sha256 == sha256).first()
+
+def _record_blob(db: Session, tmp: str, subdir: str, sha256: str, md5: str, size: int, original_name: str, file_type: str | None):
+    # 同一子目录内相同内容只保留一份：已存在的 blob 直接复用，丢弃本次临时文件。
+    # 只 flush 不提交，记录与调用方的其他改动在同一事务内生效
+    row = _find_blob(db, subdir, sha256)
+    if row and os.path.exists(row.file_path):
+        os.remove(tmp)
+        _keep(db, row.file_path)
+        return row
+    path = blob_path(subdir, sha256, _extension(original_name))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(tmp, path)
+    _keep(db, path)
+    if row:
+        row.file_path = path
+        return row
+    db.execute(_insert_ignore(db).values(
+        filename=os.path.basename(path),
+        original_name=original_name,
+        file_path=path,
+        file_type=file_type,
+        file_size=size,
+        md5_hash=md5,
+        sha256=sha256,
+        subdir=subdir,
+        ref_count=0,
+        is_safe=True,
+        uploaded_at=datetime.utcnow(),
+    ))
+    # 以先写入的记录为准
+    return _find_blob(db, subdir, sha256)
+
+def save_upload(db: Session, file, subdir: str):
+    target_dir = os.path.join(settings.upload_dir, subdir)
     os.makedirs(target_dir, exist_ok=True)
-    name = os.urandom(8).hex() + "_" + _safe_filename(file.filename)
-    path = os.path.join(target_dir, name)
-    data = file.file.read()
-    if len(data) > 10 * 1024 * 1024:
-        raise ValueError("file too large")
-    with open(path, "wb") as f:
-        f.write(data)
-    md5 = hashlib.md5(data).hexdigest()
-    return path, md5
+    limit = settings.max_upload_bytes
+    if getattr(file, "size", None) and file.size > limit:
+        raise UploadTooLarge("file too large")
+    # 分块写入同目录临时文件并增量计算摘要，超限立即中止，完成后原子改名
+    md5 = hashlib.md5()
+    sha256 = hashlib.sha256()
+    size = 0
+    fd, tmp = tempfile.mkstemp(dir=target_dir, prefix=".upload-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = file.file.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > limit:
+                    raise UploadTooLarge("file too large")
+                md5.update(chunk)
+                sha256.update(chunk)
+                f.write(chunk)
+        row = _record_blob(db, tmp, subdir, sha256.hexdigest(), md5.hexdigest(), size, _safe_filename(file.filename), file.content_type)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return row.file_path, row.md5_hash
 
-def save_markdown_upload(file):
+def save_markdown_upload(db: Session, file):
     if not (file.filename.lower().endswith('.md') or file.content_type in {'text/markdown', 'text/plain'}):
         raise ValueError("invalid markdown file")
-    return save_upload(file, 'markdown')
+    path, md5 = save_upload(db, file, 'markdown')
+    if load_artifact(path) is None:
+        prerender(path)
+    return path, md5
 
-def save_image_upload(file):
+def write_markdown(db: Session, filename: str, content: str):
+    data = content.encode("utf-8")
+    target_dir = os.path.join(settings.upload_dir, "markdown")
+    os.makedirs(target_dir, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=target_dir, prefix=".upload-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        row = _record_blob(db, tmp, "markdown", hashlib.sha256(data).hexdigest(), hashlib.md5(data).hexdigest(), len(data), filename, "text/markdown")
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    if load_artifact(row.file_path) is None:
+        prerender(row.file_path)
+    return row.file_path
+
+def save_image_upload(db: Session, file):
     if file.content_type not in IMAGE_TYPES:
         raise ValueError("invalid image type")
-    return save_upload(file, 'images')
\ No newline at end of file
+    return save_upload(db, file, 'images')
+
+def acquire_file(db: Session, path: str | None):
+    if not path:
+        return
+    row = db.query(File).filter(File.file_path == path).first()
+    if row:
+        row.ref_count = (row.ref_count or 0) + 1
+
+def release_file(db: Session, path: str | None):
+    # 引用归零的 blob 连同预渲染产物一并回收；不在 files 表中的旧文件不做处理
+    if not path:
+        return
+    row = db.query(File).filter(File.file_path == path).first()
+    if not row:
+        return
+    row.ref_count = max((row.ref_count or 0) - 1, 0)
+    if row.ref_count > 0:
+        return
+    db.delete(row)
+    db.flush()
+    _schedule_removal(db, path)
+
+def collect_orphans(db: Session, grace_seconds: int):
+    """回收超过宽限期仍无人引用的 blob（上传后未绑定，或绑定前请求失败留下的记录），返回回收条数"""
+    cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+    # 引用计数列是后加的，没有 sha256 的旧记录计数不可信，一律不动；仍被内容引用的也跳过
+    rows = db.query(File.id, File.file_path).filter(
+        File.sha256.isnot(None),
+        File.ref_count <= 0,
+        File.uploaded_at < cutoff,
+        *[File.file_path.not_in(select(m.content_path).where(m.content_path.isnot(None))) for m in (Post, Project, LifePost)],
+    ).all()
+    if not rows:
+        return 0
+    db.query(File).filter(File.id.in_([i for i, _ in rows])).delete(synchronize_session=False)
+    for _, path in rows:
+        _schedule_removal(db, path)
+    db.commit()
+    return len(rows)
+
+def set_content_path(db: Session, obj, path: str | None):
+    old = obj.content_path
+    if old == path:
+        return
+    acquire_file(db, path)
+    obj.content_path = path
+    release_file(db, old)
+
+def get_blob(db: Session, sha256: str):
+    return db.query(File).filter(File.sha256 == sha256, File.subdir.in_(PUBLIC_SUBDIRS)).order_by(File.id).first()
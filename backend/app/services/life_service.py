@@ -1,57 +1,76 @@
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from ..models.life_post import LifePost
-from ..core.config import settings
-import os
+from ..utils.pagination import paginate_async
+from .render_service import render_cache
+from .file_service import write_markdown, set_content_path, release_file
+from ..utils.response_cache import response_cache
+from .search_service import sync_life, remove_document
+from . import counter_service
+from .counter_service import apply_life_change
 
 def create_life(db: Session, data, content: str | None):
     content_path = None
     if content:
-        root = settings.upload_dir
-        d = os.path.join(root, 'markdown')
-        os.makedirs(d, exist_ok=True)
-        name = f"life_{os.urandom(6).hex()}.md"
-        content_path = os.path.join(d, name)
-        with open(content_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        content_path = write_markdown(db, "life.md", content)
     lp = LifePost(
         title=data.title,
         summary=data.summary,
-        is_published=data.is_published,
-        content_path=content_path
+        is_published=data.is_published
     )
+    set_content_path(db, lp, content_path)
     db.add(lp)
+    db.flush()
+    apply_life_change(db, False, lp.is_published)
     db.commit()
     db.refresh(lp)
+    sync_life(db, lp)
+    response_cache.invalidate_kind("life")
     return lp
 
 def update_life(db: Session, life_id: int, data):
     lp = db.get(LifePost, life_id)
     if not lp:
         return None
+    was_published = lp.is_published
     for k in ['title','summary','is_published']:
         v = getattr(data, k, None)
         if v is not None:
             setattr(lp, k, v)
+    apply_life_change(db, was_published, lp.is_published)
     db.commit()
     db.refresh(lp)
+    sync_life(db, lp)
+    response_cache.invalidate_kind("life")
     return lp
 
+def set_life_published(db: Session, lp, is_published: bool):
+    """切换发布状态并同步计数；不提交事务"""
+    apply_life_change(db, lp.is_published, is_published)
+    lp.is_published = is_published
+
 def get_life(db: Session, life_id: int):
     return db.get(LifePost, life_id)
 
-def list_life(db: Session, page: int, limit: int):
-    base = db.query(LifePost).filter(LifePost.is_published == True)
-    total = base.count()
-    items = base.order_by(LifePost.created_at.desc()).offset((page-1)*limit).limit(limit).all()
-    return {"items": items, "total": total}
+async def get_life_async(db: AsyncSession, life_id: int):
+    return await db.get(LifePost, life_id)
+
+async def list_life(db: AsyncSession, page: int, limit: int, cursor: str | None = None, with_total: bool | None = None):
+    base = select(LifePost).where(LifePost.is_published == True)
+    return await paginate_async(db, base, LifePost, page, limit, cursor, with_total, count=lambda: counter_service.total(db, counter_service.LIFE))
 
 def delete_life(db: Session, life_id: int):
     lp = db.get(LifePost, life_id)
     if not lp:
         return False
+    render_cache.invalidate(lp.content_path)
+    remove_document(db, "life", life_id)
+    release_file(db, lp.content_path)
+    apply_life_change(db, lp.is_published, False)
     db.delete(lp)
     db.commit()
+    response_cache.invalidate_kind("life")
     return True
 
 def read_content(db: Session, life_id: int):
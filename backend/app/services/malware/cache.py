@@ -0,0 +1,89 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+class VerdictCache:
+    def __init__(self, db_path: str | None, max_entries: int = 10000):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.fingerprint = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = None
+        self.logger = logging.getLogger(__name__)
+
+    def _connect(self):
+        if self.conn is None and self.db_path:
+            try:
+                os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+                self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                self.conn.execute("CREATE TABLE IF NOT EXISTS verdicts (sha256 TEXT NOT NULL, fingerprint TEXT NOT NULL, label TEXT NOT NULL, score REAL NOT NULL, created_at REAL NOT NULL, PRIMARY KEY (sha256, fingerprint))")
+                self.conn.commit()
+            except sqlite3.Error as e:
+                self.logger.warning(f"Verdict cache disabled: {e}")
+                self.db_path = None
+                self.conn = None
+        return self.conn
+
+    def _switch(self, fingerprint: str):
+        # 模型集合或阈值变化后，旧判定全部作废
+        if fingerprint == self.fingerprint:
+            return
+        self.entries.clear()
+        conn = self._connect()
+        if conn is not None:
+            conn.execute("DELETE FROM verdicts WHERE fingerprint != ?", (fingerprint,))
+            conn.commit()
+        self.fingerprint = fingerprint
+
+    def get(self, sha256: str, fingerprint: str):
+        with self.lock:
+            self._switch(fingerprint)
+            verdict = self.entries.get(sha256)
+            if verdict is not None:
+                self.entries.move_to_end(sha256)
+                self.hits += 1
+                return verdict
+            conn = self._connect()
+            row = None
+            if conn is not None:
+                row = conn.execute("SELECT label, score FROM verdicts WHERE sha256 = ? AND fingerprint = ?", (sha256, fingerprint)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            verdict = (row[0], float(row[1]))
+            self._remember(sha256, verdict)
+            return verdict
+
+    def _remember(self, sha256: str, verdict):
+        self.entries[sha256] = verdict
+        self.entries.move_to_end(sha256)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def put(self, sha256: str, fingerprint: str, verdict):
+        with self.lock:
+            self._switch(fingerprint)
+            self._remember(sha256, verdict)
+            conn = self._connect()
+            if conn is not None:
+                conn.execute("INSERT OR REPLACE INTO verdicts (sha256, fingerprint, label, score, created_at) VALUES (?, ?, ?, ?, ?)", (sha256, fingerprint, verdict[0], verdict[1], time.time()))
+                conn.commit()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
@@ -1,4 +1,6 @@
+import hashlib
 import logging
+import threading
 import numpy as np
 from pathlib import Path
 from typing import Optional
@@ -11,6 +13,53 @@ except Exception:
     lgb = None
     PEFeatureExtractor = None
 
+_extractor = None
+
+def extract_features(data: bytes):
+    # 在扫描进程池的子进程中执行，每个子进程各自持有一个特征提取器
+    global _extractor
+    if PEFeatureExtractor is None:
+        return None
+    if _extractor is None:
+        _extractor = PEFeatureExtractor()
+    feats = _extractor.feature_vector(data)
+    if feats is None:
+        return None
+    return np.asarray(feats, dtype=np.float32)
+
+def warm_worker():
+    # 预先在子进程中构造特征提取器，首个请求不再承担初始化开销
+    global _extractor
+    if PEFeatureExtractor is not None and _extractor is None:
+        _extractor = PEFeatureExtractor()
+    return os.getpid()
+
+class EnsemblePredictor:
+    def __init__(self, models, threshold: float = 0.5):
+        if not models:
+            raise ValueError("no models")
+        widths = {m.num_feature() for m in models}
+        if len(widths) != 1:
+            raise ValueError(f"fold models disagree on feature count: {sorted(widths)}")
+        self.models = models
+        self.num_feature = widths.pop()
+        self.threshold = threshold
+
+    def scores(self, feats: np.ndarray):
+        feats = np.atleast_2d(np.asarray(feats, dtype=np.float32))
+        if feats.shape[1] != self.num_feature:
+            raise ValueError(f"expected {self.num_feature} features, got {feats.shape[1]}")
+        # (folds, N) 得分矩阵一次求均值
+        out = np.empty((len(self.models), feats.shape[0]), dtype=np.float64)
+        for i, m in enumerate(self.models):
+            out[i] = m.predict(feats)
+        return out.mean(axis=0)
+
+    def predict(self, feats: np.ndarray):
+        scores = self.scores(feats)
+        labels = np.where(scores >= self.threshold, "malicious", "benign")
+        return list(zip(labels.tolist(), scores.tolist()))
+
 class ScannerConfig:
     def __init__(self, model_dir: str, threshold: float = 0.5):
         self.MODEL_DIR = model_dir
@@ -21,47 +70,99 @@ class MalwareScanner:
         self.model_dir = Path(model_dir)
         self.threshold = threshold
         self.models = []
-        self.extractor: Optional[PEFeatureExtractor] = None
+        self.ensemble: Optional[EnsemblePredictor] = None
         self.logger = logging.getLogger(__name__)
         self.initialized = False
+        self.loaded_fingerprint = None
+        self.state = "idle"
+        self.error = None
+        self.lock = threading.Lock()
+
+    def fingerprint(self):
+        # 模型文件名、大小、修改时间与阈值共同决定判定结果，任一变化即视为新模型集合
+        h = hashlib.sha256(f"threshold={self.threshold}".encode())
+        for f in sorted(self.model_dir.glob("model_fold*.txt")):
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            h.update(f"|{f.name}:{st.st_size}:{st.st_mtime_ns}".encode())
+        return h.hexdigest()
+
+    def refresh(self):
+        fp = self.fingerprint()
+        if self.initialized and self.loaded_fingerprint is not None and fp != self.loaded_fingerprint:
+            self.logger.info(f"Model set in {self.model_dir} changed; reloading")
+            self.initialized = False
+        return fp
 
     def ensure_initialized(self):
         if self.initialized:
-            return True
+            return self.ready
+        with self.lock:
+            if self.initialized:
+                return self.ready
+            self._load()
+            self.initialized = True
+        return self.ready
+
+    def _load(self):
+        self.state = "loading"
         if PEFeatureExtractor is None or lgb is None:
             self.logger.warning("Malware scanner dependencies not available; using fallback")
-            self.initialized = True
-            return False
+            self.state = "fallback"
+            return
         try:
-            self.extractor = PEFeatureExtractor()
+            # 特征提取在扫描进程池的子进程中完成，主进程只加载模型
+            self.loaded_fingerprint = self.fingerprint()
             files = sorted(self.model_dir.glob("model_fold*.txt"))
             if len(files) == 0:
                 self.logger.warning(f"No model files found in {self.model_dir}")
-            for f in files:
-                self.models.append(lgb.Booster(model_file=str(f)))
-            self.initialized = True
-            return True
+                self.models, self.ensemble = [], None
+                self.state = "fallback"
+                return
+            models = [lgb.Booster(model_file=str(f)) for f in files]
+            self.ensemble = EnsemblePredictor(models, self.threshold)
+            self.models = models
+            self.error = None
+            self.state = "ready"
         except Exception as e:
             self.logger.error(f"Scanner init error: {e}")
-            self.initialized = True
-            return False
+            self.error = str(e)
+            self.state = "error"
+
+    @property
+    def ready(self):
+        return self.initialized and self.ensemble is not None
+
+    def status(self):
+        return {
+            "state": self.state,
+            "ready": self.ready,
+            "models": len(self.models),
+            "num_feature": self.ensemble.num_feature if self.ensemble is not None else None,
+            "error": self.error,
+        }
+
+    def fallback(self, data: bytes):
+        s = 0.5
+        l = data.lower()
+        if b"malware" in l or b"virus" in l:
+            s = 0.9
+        return ("malicious" if s >= 0.7 else "benign", s)
+
+    def predict_batch(self, feats: np.ndarray):
+        # feats 为 (N, F) 特征矩阵，每个 fold 模型只调用一次 predict
+        return self.ensemble.predict(feats)
 
     def predict(self, data: bytes):
-        ready = self.ensure_initialized()
-        if not ready or len(self.models) == 0 or self.extractor is None:
-            s = 0.5
-            l = data.lower()
-            if b"malware" in l or b"virus" in l:
-                s = 0.9
-            return ("malicious" if s >= 0.7 else "benign", s)
+        if not self.ensure_initialized():
+            return self.fallback(data)
         try:
-            feats = self.extractor.feature_vector(data)
+            feats = extract_features(data)
             if feats is None:
                 raise ValueError("Feature extraction failed")
-            feats = np.array(feats, dtype=np.float32)
-            scores = [float(m.predict([feats])[0]) for m in self.models]
-            ensemble = float(np.mean(scores))
-            return ("malicious" if ensemble >= self.threshold else "benign", ensemble)
+            return self.ensemble.predict(feats)[0]
         except Exception as e:
             self.logger.error(f"Predict error: {e}")
-            return ("benign", 0.5)
\ No newline at end of file
+            return ("benign", 0.5)
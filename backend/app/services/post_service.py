@@ -1,56 +1,57 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from ..models.post import Post
 from ..models.user import User
 from ..models.tag import Tag
 from ..models.post_tag import PostTag
-from ..core.config import settings
-import bcrypt
-import os
+from ..utils.pagination import paginate_async
+from .render_service import render_cache
+from .file_service import write_markdown, set_content_path, release_file
+from ..utils.response_cache import response_cache
+from .search_service import sync_post, remove_document
+from .tag_service import sync_post_tags, remove_post_tags
+from . import counter_service
+from .counter_service import post_state, apply_post_change
+from ..core.passwords import hash_password, verify_password
 
-def create_post(db: Session, author_id: int, data, content: str | None):
-    content_path = None
+def create_post(db: Session, author_id: int, data, content: str | None, content_path: str | None = None, uploader_name: str | None = None):
     if content is not None:
-        upload_root = settings.upload_dir
-        markdown_dir = os.path.join(upload_root, "markdown")
-        os.makedirs(markdown_dir, exist_ok=True)
-        filename = f"post_{author_id}_{os.urandom(6).hex()}.md"
-        content_path = os.path.join(markdown_dir, filename)
-        with open(content_path, "w", encoding="utf-8") as f:
-            f.write(content)
+        content_path = write_markdown(db, f"post_{author_id}.md", content)
     password_hash = None
     if data.password:
-        password_hash = bcrypt.hashpw(data.password.encode(), bcrypt.gensalt()).decode()
+        password_hash = hash_password(data.password)
     post = Post(
         title=data.title,
         summary=data.summary,
-        content_path=content_path,
         author_id=author_id,
         category_id=data.category_id,
         is_published=data.is_published,
         is_protected=data.is_protected,
         password_hash=password_hash,
+        uploader_name=uploader_name,
     )
+    set_content_path(db, post, content_path)
     db.add(post)
+    # 文章、内容引用与标签在同一事务中写入
+    db.flush()
+    if data.tags:
+        sync_post_tags(db, post.id, data.tags)
+    apply_post_change(db, None, post_state(db, post))
     db.commit()
     db.refresh(post)
-    if data.tags:
-        for name in data.tags:
-            t = db.query(Tag).filter(Tag.name == name).first()
-            if not t:
-                t = Tag(name=name, slug=name)
-                db.add(t)
-                db.commit()
-                db.refresh(t)
-            if not db.query(PostTag).filter(PostTag.post_id == post.id, PostTag.tag_id == t.id).first():
-                db.add(PostTag(post_id=post.id, tag_id=t.id))
-        db.commit()
+    sync_post(db, post)
+    response_cache.invalidate_kind("post")
     return post
 
 def update_post(db: Session, post_id: int, data):
     post = db.get(Post, post_id)
     if not post:
         return None
+    render_cache.invalidate(post.content_path)
+    # 只有发布状态、分类或标签变化才影响计数
+    counted = data.is_published is not None or data.category_id is not None or data.tags is not None
+    before = post_state(db, post) if counted else None
     if data.title is not None:
         post.title = data.title
     if data.summary is not None:
@@ -62,49 +63,79 @@ def update_post(db: Session, post_id: int, data):
     if data.is_protected is not None:
         post.is_protected = data.is_protected
     if data.password is not None:
-        post.password_hash = bcrypt.hashpw(data.password.encode(), bcrypt.gensalt()).decode()
+        post.password_hash = hash_password(data.password)
     if data.tags is not None:
-        db.query(PostTag).filter(PostTag.post_id == post_id).delete()
-        if data.tags:
-            for name in data.tags:
-                t = db.query(Tag).filter(Tag.name == name).first()
-                if not t:
-                    t = Tag(name=name, slug=name)
-                    db.add(t)
-                    db.commit()
-                    db.refresh(t)
-                if not db.query(PostTag).filter(PostTag.post_id == post.id, PostTag.tag_id == t.id).first():
-                    db.add(PostTag(post_id=post.id, tag_id=t.id))
-        db.commit()
+        sync_post_tags(db, post_id, data.tags)
+    if counted:
+        apply_post_change(db, before, post_state(db, post))
     db.commit()
     db.refresh(post)
+    sync_post(db, post)
+    response_cache.invalidate_kind("post")
     return post
 
+def set_post_published(db: Session, post, is_published: bool):
+    """切换发布状态并同步计数；不提交事务"""
+    before = post_state(db, post)
+    post.is_published = is_published
+    apply_post_change(db, before, (bool(is_published),) + before[1:])
+
 def get_post(db: Session, post_id: int):
     return db.get(Post, post_id)
 
-def list_posts(db: Session, page: int, limit: int, tag: str | None = None):
+async def get_post_async(db: AsyncSession, post_id: int):
+    return await db.get(Post, post_id)
+
+def listing_options():
+    return (joinedload(Post.category), joinedload(Post.author))
+
+async def serialize_listing(db: AsyncSession, posts):
+    # 一次查询取回整页文章的标签，分类与作者由 listing_options 预加载
+    tag_map = {p.id: [] for p in posts}
+    if tag_map:
+        rows = await db.execute(select(PostTag.post_id, Tag.id, Tag.name, Tag.slug).join(Tag, Tag.id == PostTag.tag_id).where(PostTag.post_id.in_(list(tag_map))).order_by(Tag.name.asc()))
+        for post_id, tid, name, slug in rows:
+            tag_map[post_id].append({"id": tid, "name": name, "slug": slug})
+    return [{
+        "id": p.id,
+        "title": p.title,
+        "summary": p.summary,
+        "is_published": p.is_published,
+        "is_protected": p.is_protected,
+        "created_at": p.created_at,
+        "uploader_name": p.uploader_name,
+        "category": {"name": p.category.name} if p.category else None,
+        "author": {"username": p.author.username} if p.author else None,
+        "tags": tag_map[p.id],
+    } for p in posts]
+
+async def latest_posts(db: AsyncSession, limit: int):
+    stmt = select(Post).options(*listing_options()).where(Post.is_published == True).order_by(Post.created_at.desc()).limit(limit)
+    return (await db.execute(stmt)).scalars().all()
+
+async def list_posts(db: AsyncSession, page: int, limit: int, tag: str | None = None, cursor: str | None = None, with_total: bool | None = None):
+    base = select(Post).where(Post.is_published == True)
     if tag:
-        from ..models.tag import Tag
-        from ..models.post_tag import PostTag
-        t = db.query(Tag).filter(Tag.slug == tag).first()
-        if not t:
+        row = (await db.execute(select(Tag.id, Tag.post_count).where(Tag.slug == tag))).first()
+        if row is None:
             return {"items": [], "total": 0}
-        base = db.query(Post).join(PostTag, PostTag.post_id == Post.id).filter(PostTag.tag_id == t.id, Post.is_published == True)
-        total = base.count()
-        q = base.order_by(Post.created_at.desc()).offset((page - 1) * limit).limit(limit).all()
-        return {"items": q, "total": total}
-    base = db.query(Post).filter(Post.is_published == True)
-    total = base.count()
-    q = base.order_by(Post.created_at.desc()).offset((page - 1) * limit).limit(limit).all()
-    return {"items": q, "total": total}
+        tag_id, post_count = row
+        base = base.join(PostTag, PostTag.post_id == Post.id).where(PostTag.tag_id == tag_id)
+        return await paginate_async(db, base, Post, page, limit, cursor, with_total, options=listing_options(), count=post_count)
+    return await paginate_async(db, base, Post, page, limit, cursor, with_total, options=listing_options(), count=lambda: counter_service.total(db, counter_service.POSTS))
 
 def delete_post(db: Session, post_id: int):
     post = db.get(Post, post_id)
     if not post:
         return False
+    render_cache.invalidate(post.content_path)
+    remove_document(db, "post", post_id)
+    release_file(db, post.content_path)
+    apply_post_change(db, post_state(db, post), None)
+    remove_post_tags(db, post_id)
     db.delete(post)
     db.commit()
+    response_cache.invalidate_kind("post")
     return True
 
 def read_content(db: Session, post_id: int):
@@ -118,4 +149,4 @@ def verify_post_password(db: Session, post_id: int, password: str):
     post = db.get(Post, post_id)
     if not post or not post.password_hash:
         return False
-    return bcrypt.checkpw(password.encode(), post.password_hash.encode())
\ No newline at end of file
+    return verify_password(password, post.password_hash)
\ No newline at end of file
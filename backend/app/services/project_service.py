@@ -1,31 +1,36 @@
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from ..models.project import Project
-from ..core.config import settings
-import os
+from ..utils.pagination import paginate_async
+from .render_service import render_cache
+from .file_service import write_markdown, set_content_path, release_file
+from ..utils.response_cache import response_cache
+from .search_service import sync_project, remove_document
+from .tag_service import sync_project_tags, remove_project_tags
+from . import counter_service
+from .counter_service import project_state, apply_project_change
 
 def create_project(db: Session, author_id: int, data, content: str | None):
     content_path = None
     if content:
-        root = settings.upload_dir
-        d = os.path.join(root, 'markdown')
-        os.makedirs(d, exist_ok=True)
-        name = f"project_{author_id}_{os.urandom(6).hex()}.md"
-        content_path = os.path.join(d, name)
-        with open(content_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        content_path = write_markdown(db, f"project_{author_id}.md", content)
     proj = Project(
         name=data.name,
         description=data.description,
         demo_url=data.demo_url,
         source_url=data.source_url,
         cover_image=data.cover_image,
-        author_id=author_id,
-        content_path=content_path
+        author_id=author_id
     )
+    set_content_path(db, proj, content_path)
     db.add(proj)
+    db.flush()
+    apply_project_change(db, None, frozenset())
     db.commit()
     db.refresh(proj)
+    sync_project(db, proj)
+    response_cache.invalidate_kind("project")
     return proj
 
 def update_project(db: Session, project_id: int, data):
@@ -38,22 +43,37 @@ def update_project(db: Session, project_id: int, data):
             setattr(p, k, v)
     db.commit()
     db.refresh(p)
+    sync_project(db, p)
+    response_cache.invalidate_kind("project")
     return p
 
+def set_project_tags(db: Session, project, names):
+    """同步项目标签并更新标签计数；不提交事务"""
+    before = project_state(db, project)
+    sync_project_tags(db, project.id, names)
+    apply_project_change(db, before, project_state(db, project))
+
 def get_project(db: Session, project_id: int):
     return db.get(Project, project_id)
 
-def list_projects(db: Session, page: int, limit: int):
-    items = db.execute(select(Project).order_by(Project.created_at.desc()).offset((page-1)*limit).limit(limit)).scalars().all()
-    total = db.query(Project).count()
-    return {"items": items, "total": total}
+async def get_project_async(db: AsyncSession, project_id: int):
+    return await db.get(Project, project_id)
+
+async def list_projects(db: AsyncSession, page: int, limit: int, cursor: str | None = None, with_total: bool | None = None):
+    return await paginate_async(db, select(Project), Project, page, limit, cursor, with_total, count=lambda: counter_service.total(db, counter_service.PROJECTS))
 
 def delete_project(db: Session, project_id: int):
     p = db.get(Project, project_id)
     if not p:
         return False
+    render_cache.invalidate(p.content_path)
+    remove_document(db, "project", project_id)
+    release_file(db, p.content_path)
+    apply_project_change(db, project_state(db, p), None)
+    remove_project_tags(db, project_id)
     db.delete(p)
     db.commit()
+    response_cache.invalidate_kind("project")
     return True
 
 def read_content(db: Session, project_id: int):
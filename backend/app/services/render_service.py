@@ -0,0 +1,226 @@
+import hashlib
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+import aiofiles
+import markdown
+from starlette.concurrency import run_in_threadpool
+from ..core.config import settings
+
+MARKDOWN_EXTENSIONS = ["tables", "fenced_code", "toc"]
+WORDS_PER_MINUTE = 300
+
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]")
+_WORD_RE = re.compile(r"[A-Za-z0-9_]+(?:['-][A-Za-z0-9_]+)*")
+_TAG_RE = re.compile(r"<[^>]+>")
+
+def count_words(html: str):
+    # 中文按字计数，其他语言按词计数
+    plain = _TAG_RE.sub(" ", html)
+    return len(_CJK_RE.findall(plain)) + len(_WORD_RE.findall(_CJK_RE.sub(" ", plain)))
+
+def render_document(text: str):
+    md = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+    html = md.convert(text)
+    words = count_words(html)
+    return {
+        "html": html,
+        "toc": md.toc if getattr(md, "toc_tokens", None) else "",
+        "word_count": words,
+        "reading_time": math.ceil(words / WORDS_PER_MINUTE) if words else 0,
+    }
+
+def _source_key(path: str):
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+def content_validators(path: str | None):
+    # 由源文件路径、修改时间与大小得出 (ETag, Last-Modified)，无需渲染即可判断内容是否变化
+    if not path:
+        return None
+    try:
+        key = _source_key(path)
+    except OSError:
+        return None
+    digest = hashlib.sha1(f"{key[0]}|{key[1]}|{key[2]}|{','.join(MARKDOWN_EXTENSIONS)}".encode()).hexdigest()[:20]
+    return f'"{digest}"', key[1] / 1e9
+
+def artifact_paths(path: str):
+    base = os.path.splitext(path)[0]
+    return base + ".html", base + ".meta.json"
+
+# 保证同一进程内 .html 与 .meta.json 成对写入，不会与另一次渲染交错
+_artifact_lock = threading.Lock()
+
+def _write_atomic(target: str, text: str):
+    # 每次写入独占一个临时文件：同一进程内的写入预渲染与读取时的懒渲染可能并发
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, target)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def prerender(path: str):
+    key = _source_key(path)
+    with open(path, "r", encoding="utf-8") as f:
+        doc = render_document(f.read())
+    html_path, meta_path = artifact_paths(path)
+    meta = {
+        "source_mtime_ns": key[1],
+        "source_size": key[2],
+        "toc": doc["toc"],
+        "word_count": doc["word_count"],
+        "reading_time": doc["reading_time"],
+    }
+    try:
+        with _artifact_lock:
+            _write_atomic(html_path, doc["html"])
+            _write_atomic(meta_path, json.dumps(meta, ensure_ascii=False))
+    except OSError:
+        pass
+    return doc
+
+def load_artifact(path: str, key=None):
+    key = key or _source_key(path)
+    html_path, meta_path = artifact_paths(path)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("source_mtime_ns") != key[1] or meta.get("source_size") != key[2]:
+            return None
+        with open(html_path, "r", encoding="utf-8") as f:
+            html = f.read()
+    except (OSError, ValueError):
+        return None
+    return {"html": html, "toc": meta.get("toc", ""), "word_count": meta.get("word_count", 0), "reading_time": meta.get("reading_time", 0)}
+
+async def load_artifact_async(path: str, key):
+    html_path, meta_path = artifact_paths(path)
+    try:
+        async with aiofiles.open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.loads(await f.read())
+        if meta.get("source_mtime_ns") != key[1] or meta.get("source_size") != key[2]:
+            return None
+        async with aiofiles.open(html_path, "r", encoding="utf-8") as f:
+            html = await f.read()
+    except (OSError, ValueError):
+        return None
+    return {"html": html, "toc": meta.get("toc", ""), "word_count": meta.get("word_count", 0), "reading_time": meta.get("reading_time", 0)}
+
+def _cost(doc):
+    return len(doc["html"].encode("utf-8")) + len(doc["toc"].encode("utf-8"))
+
+class RenderCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.artifact_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def _put(self, key, doc):
+        cost = _cost(doc)
+        if cost > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= _cost(old)
+            self.entries[key] = doc
+            self.size += cost
+            while self.size > self.max_bytes and self.entries:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= _cost(evicted)
+                self.evictions += 1
+
+    def _cached(self, key):
+        with self.lock:
+            doc = self.entries.get(key)
+            if doc is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+            return doc
+
+    def _loaded(self, key, doc, from_artifact: bool):
+        with self.lock:
+            if from_artifact:
+                self.artifact_hits += 1
+            else:
+                self.misses += 1
+        self._put(key, doc)
+        return doc
+
+    def get(self, path: str):
+        key = _source_key(path)
+        doc = self._cached(key)
+        if doc is not None:
+            return doc
+        doc = load_artifact(path, key)
+        if doc is not None:
+            return self._loaded(key, doc, True)
+        # 旧内容没有预渲染产物时，在读路径补渲染一次并落盘
+        return self._loaded(key, prerender(path), False)
+
+    async def get_async(self, path: str):
+        key = _source_key(path)
+        doc = self._cached(key)
+        if doc is not None:
+            return doc
+        doc = await load_artifact_async(path, key)
+        if doc is not None:
+            return self._loaded(key, doc, True)
+        return self._loaded(key, await run_in_threadpool(prerender, path), False)
+
+    def invalidate(self, path: str | None):
+        if not path:
+            return
+        target = os.path.abspath(path)
+        with self.lock:
+            for key in [k for k in self.entries if k[0] == target]:
+                self.size -= _cost(self.entries.pop(key))
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.artifact_hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "artifact_hits": self.artifact_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.artifact_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+render_cache = RenderCache(max_bytes=settings.render_cache_bytes)
+
+EMPTY_DOCUMENT = {"html": "", "toc": "", "word_count": 0, "reading_time": 0}
+
+def render_content_document(content_path: str | None):
+    if not content_path:
+        return EMPTY_DOCUMENT
+    return render_cache.get(content_path)
+
+def _content_payload(doc):
+    return {"content": doc["html"], "toc": doc["toc"], "word_count": doc["word_count"], "reading_time": doc["reading_time"]}
+
+async def content_response_async(content_path: str | None):
+    if not content_path:
+        return _content_payload(EMPTY_DOCUMENT)
+    return _content_payload(await render_cache.get_async(content_path))
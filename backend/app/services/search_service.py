@@ -0,0 +1,328 @@
+import html
+import logging
+import math
+import re
+import threading
+from collections import defaultdict
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from ..core.config import settings
+from ..models.post import Post
+from ..models.project import Project
+from ..models.life_post import LifePost
+from ..models.tag import Tag
+from ..models.post_tag import PostTag
+from .render_service import render_content_document
+
+logger = logging.getLogger(__name__)
+
+KINDS = {"post": 1, "project": 2, "life": 3}
+# 列权重：标题 > 标签 > 摘要 > 正文
+FIELD_WEIGHTS = {"title": 10.0, "summary": 4.0, "tags": 6.0, "body": 1.0}
+MARK_OPEN, MARK_CLOSE = "\x02", "\x03"
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+")
+_WORD_RE = re.compile(r"[0-9a-z_]+")
+
+def _plain_text(content_path: str | None):
+    if not content_path:
+        return ""
+    try:
+        doc = render_content_document(content_path)
+    except OSError:
+        return ""
+    return re.sub(r"\s+", " ", html.unescape(_TAG_RE.sub(" ", doc["html"]))).strip()
+
+def _rowid(kind: str, ref_id: int):
+    return ref_id * 4 + KINDS[kind]
+
+def _render_marks(marked: str):
+    return html.escape(marked).replace(MARK_OPEN, "<mark>").replace(MARK_CLOSE, "</mark>")
+
+def _mark_terms(value: str, terms, width: int | None = None):
+    lower = value.lower()
+    spans = []
+    for term in terms:
+        start = lower.find(term)
+        while start != -1:
+            spans.append((start, start + len(term)))
+            start = lower.find(term, start + len(term))
+    spans.sort()
+    if width is not None:
+        first = spans[0][0] if spans else 0
+        lo = max(0, first - width // 3)
+        hi = min(len(value), lo + width)
+        spans = [(s, e) for s, e in spans if s >= lo and e <= hi]
+    else:
+        lo, hi = 0, len(value)
+    out, pos = [], lo
+    for s, e in spans:
+        if s < pos:
+            continue
+        out.append(value[pos:s] + MARK_OPEN + value[s:e] + MARK_CLOSE)
+        pos = e
+    out.append(value[pos:hi])
+    marked = "".join(out)
+    if width is not None:
+        marked = ("…" if lo > 0 else "") + marked + ("…" if hi < len(value) else "")
+    return _render_marks(marked)
+
+def query_terms(q: str):
+    return [t for t in q.lower().split() if t]
+
+def tokenize(value: str):
+    # 英文按词，中日文按二元组切分（单字保留为一元）
+    value = value.lower()
+    tokens = _WORD_RE.findall(value)
+    for run in _CJK_RE.findall(value):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+class FtsSearchIndex:
+    name = "fts5"
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.trigram = True
+
+    def setup(self):
+        with self.engine.begin() as conn:
+            try:
+                conn.execute(text("CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(kind UNINDEXED, ref_id UNINDEXED, title, summary, tags, body, tokenize='trigram')"))
+            except Exception:
+                # 旧版 SQLite 不支持 trigram，退回 unicode61
+                self.trigram = False
+                conn.execute(text("CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(kind UNINDEXED, ref_id UNINDEXED, title, summary, tags, body)"))
+            sql = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'search_index'")).scalar() or ""
+            self.trigram = "trigram" in sql
+            return conn.execute(text("SELECT 1 FROM search_index LIMIT 1")).first() is None
+
+    def upsert(self, db: Session, doc):
+        rowid = _rowid(doc["kind"], doc["id"])
+        db.execute(text("DELETE FROM search_index WHERE rowid = :rowid"), {"rowid": rowid})
+        db.execute(text("INSERT INTO search_index(rowid, kind, ref_id, title, summary, tags, body) VALUES (:rowid, :kind, :id, :title, :summary, :tags, :body)"), {"rowid": rowid, **doc})
+
+    def remove(self, db: Session, kind: str, ref_id: int):
+        db.execute(text("DELETE FROM search_index WHERE rowid = :rowid"), {"rowid": _rowid(kind, ref_id)})
+
+    def clear(self, db: Session):
+        db.execute(text("DELETE FROM search_index"))
+
+    def search(self, db: Session, q: str, kind: str | None, limit: int):
+        terms = query_terms(q)
+        if not terms:
+            return []
+        params = {"limit": limit}
+        where = []
+        if kind:
+            where.append("kind = :kind")
+            params["kind"] = kind
+        match = [t for t in terms if not self.trigram or len(t) >= 3]
+        if match:
+            where.append("search_index MATCH :match")
+            params["match"] = " ".join('"' + t.replace('"', '""') + '"' for t in match)
+        # trigram 无法匹配不足三个字符的词，退化为逐行 instr 过滤
+        for i, t in enumerate(terms):
+            if t in match:
+                continue
+            where.append(f"instr(lower(title || ' ' || coalesce(summary, '') || ' ' || coalesce(tags, '') || ' ' || body), :t{i}) > 0")
+            params[f"t{i}"] = t
+        w = FIELD_WEIGHTS
+        rank = f"bm25(search_index, 0, 0, {w['title']}, {w['summary']}, {w['tags']}, {w['body']})" if match else "0"
+        # 先只对 rowid 排序取前 N 条，再回表读取正文，避免排序时搬运整篇正文
+        rows = db.execute(text(
+            f"SELECT s.kind, s.ref_id, s.title, s.summary, s.body, top.score FROM "
+            f"(SELECT rowid AS rid, {rank} AS score FROM search_index WHERE {' AND '.join(where)} ORDER BY score, rowid DESC LIMIT :limit) AS top "
+            f"JOIN search_index AS s ON s.rowid = top.rid ORDER BY top.score, top.rid DESC"
+        ), params).fetchall()
+        return [{
+            "kind": r[0],
+            "id": int(r[1]),
+            "title": _mark_terms(r[2] or "", terms),
+            "summary": r[3],
+            "snippet": _mark_terms(r[4] or r[3] or "", terms, width=120),
+            "score": round(-float(r[5]), 4) or 0.0,
+        } for r in rows]
+
+class InvertedIndex:
+    """FTS5 不可用时的单进程兜底：索引只在当前进程内存中，每次启动全量重建；
+    多 worker 部署时各进程各建一份，增量同步只会落到处理写请求的那个进程"""
+    name = "inverted"
+
+    def __init__(self):
+        self.docs = {}
+        self.postings = defaultdict(dict)
+        self.lock = threading.Lock()
+
+    def setup(self):
+        # 内存索引不落盘，总是需要重建
+        return True
+
+    def _drop(self, key):
+        doc = self.docs.pop(key, None)
+        if not doc:
+            return
+        for token in doc["_tokens"]:
+            posting = self.postings.get(token)
+            if posting is not None:
+                posting.pop(key, None)
+                if not posting:
+                    del self.postings[token]
+
+    def upsert(self, db: Session, doc):
+        key = (doc["kind"], doc["id"])
+        weights = defaultdict(float)
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(doc.get(field) or ""):
+                weights[token] += weight
+        with self.lock:
+            self._drop(key)
+            self.docs[key] = {**doc, "_tokens": list(weights)}
+            for token, score in weights.items():
+                self.postings[token][key] = score
+
+    def remove(self, db: Session, kind: str, ref_id: int):
+        with self.lock:
+            self._drop((kind, ref_id))
+
+    def clear(self, db: Session):
+        with self.lock:
+            self.docs.clear()
+            self.postings.clear()
+
+    def search(self, db: Session, q: str, kind: str | None, limit: int):
+        terms = query_terms(q)
+        tokens = list(dict.fromkeys(tokenize(q)))
+        if not terms or not tokens:
+            return []
+        with self.lock:
+            postings = [self.postings.get(t, {}) for t in tokens]
+            if not all(postings):
+                return []
+            n = len(self.docs)
+            candidates = set.intersection(*(set(p) for p in postings))
+            scored = []
+            for key in candidates:
+                if kind and key[0] != kind:
+                    continue
+                doc = self.docs[key]
+                haystack = " ".join((doc.get(f) or "") for f in FIELD_WEIGHTS).lower()
+                # 二元组命中后再确认原词连续出现
+                if not all(t in haystack for t in terms):
+                    continue
+                score = sum(p[key] * math.log(1 + n / len(p)) for p in postings)
+                scored.append((score, key))
+            scored.sort(key=lambda x: (-x[0], -x[1][1]))
+            hits = [(score, self.docs[key]) for score, key in scored[:limit]]
+        return [{
+            "kind": doc["kind"],
+            "id": doc["id"],
+            "title": _mark_terms(doc["title"] or "", terms),
+            "summary": doc["summary"],
+            "snippet": _mark_terms(doc["body"] or doc["summary"] or "", terms, width=120),
+            "score": round(score, 4),
+        } for score, doc in hits]
+
+_index = None
+
+def post_document(db: Session, post: Post):
+    if not post.is_published:
+        return None
+    tags = db.query(Tag.name).join(PostTag, PostTag.tag_id == Tag.id).filter(PostTag.post_id == post.id).all()
+    return {
+        "kind": "post",
+        "id": post.id,
+        "title": post.title,
+        "summary": post.summary or "",
+        "tags": " ".join(name for (name,) in tags),
+        # 受保护文章只索引标题、摘要与标签
+        "body": "" if post.is_protected else _plain_text(post.content_path),
+    }
+
+def project_document(db: Session, p: Project):
+    # 与项目列表、信息流一致：项目全部公开
+    return {
+        "kind": "project",
+        "id": p.id,
+        "title": p.name,
+        "summary": p.description or "",
+        "tags": (p.tags_text or "").replace(",", " "),
+        "body": "" if p.is_protected else _plain_text(p.content_path),
+    }
+
+def life_document(db: Session, lp: LifePost):
+    if not lp.is_published:
+        return None
+    return {
+        "kind": "life",
+        "id": lp.id,
+        "title": lp.title,
+        "summary": lp.summary or "",
+        "tags": "",
+        "body": _plain_text(lp.content_path),
+    }
+
+DOCUMENT_BUILDERS = {"post": post_document, "project": project_document, "life": life_document}
+
+def sync_document(db: Session, kind: str, obj):
+    if _index is None or obj is None:
+        return
+    doc = DOCUMENT_BUILDERS[kind](db, obj)
+    if doc is None:
+        _index.remove(db, kind, obj.id)
+    else:
+        _index.upsert(db, doc)
+    db.commit()
+
+def sync_post(db: Session, post: Post):
+    sync_document(db, "post", post)
+
+def sync_project(db: Session, p: Project):
+    sync_document(db, "project", p)
+
+def sync_life(db: Session, lp: LifePost):
+    sync_document(db, "life", lp)
+
+def remove_document(db: Session, kind: str, ref_id: int):
+    if _index is None:
+        return
+    _index.remove(db, kind, ref_id)
+
+def rebuild(db: Session):
+    _index.clear(db)
+    count = 0
+    for kind, model in (("post", Post), ("project", Project), ("life", LifePost)):
+        for obj in db.query(model).all():
+            doc = DOCUMENT_BUILDERS[kind](db, obj)
+            if doc is not None:
+                _index.upsert(db, doc)
+                count += 1
+    db.commit()
+    return count
+
+def init_search(engine, db: Session):
+    global _index
+    index = FtsSearchIndex(engine) if engine.dialect.name == "sqlite" else InvertedIndex()
+    try:
+        empty = index.setup()
+    except Exception as e:
+        logger.warning(f"FTS5 unavailable, using in-memory index: {e}")
+        index = InvertedIndex()
+        empty = index.setup()
+    _index = index
+    if index.name == "inverted" and settings.web_concurrency > 1:
+        logger.warning("in-memory search index is per process; with WEB_CONCURRENCY=%d workers will return stale results after writes", settings.web_concurrency)
+    if empty:
+        logger.info("search index built with %d documents", rebuild(db))
+
+def search(db: Session, q: str, kind: str | None = None, limit: int = 20):
+    if _index is None:
+        return []
+    return _index.search(db, q, kind, limit)
+
+def backend_name():
+    return _index.name if _index is not None else None
@@ -0,0 +1,64 @@
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from ..models.tag import Tag
+from ..models.post_tag import PostTag
+from ..models.project_tag import ProjectTag
+
+def split_tags(text: str | None):
+    return normalize_tags((text or "").split(","))
+
+def normalize_tags(names):
+    # 去空白、去重并保持原有顺序
+    return list(dict.fromkeys(n.strip() for n in names or () if n and n.strip()))
+
+def _insert_ignore(db: Session, model, rows):
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        db.execute(sqlite.insert(model).on_conflict_do_nothing(), rows)
+    elif dialect == "postgresql":
+        db.execute(postgresql.insert(model).on_conflict_do_nothing(), rows)
+    else:
+        for row in rows:
+            try:
+                with db.begin_nested():
+                    db.execute(insert(model), [row])
+            except IntegrityError:
+                pass
+
+def upsert_tags(db: Session, names):
+    """一次查询已有标签，缺失的批量插入（并发插入的冲突忽略），返回与 names 顺序一致的 Tag 列表；不提交事务"""
+    names = normalize_tags(names)
+    if not names:
+        return []
+    found = {t.name: t for t in db.query(Tag).filter(Tag.name.in_(names))}
+    missing = [n for n in names if n not in found]
+    if missing:
+        _insert_ignore(db, Tag, [{"name": n, "slug": n} for n in missing])
+        found.update({t.name: t for t in db.query(Tag).filter(Tag.name.in_(missing))})
+    return [found[n] for n in names if n in found]
+
+def _sync_links(db: Session, model, owner: str, owner_id: int, names):
+    # 按差集增删关联表，使对象的标签与 names 一致；不提交事务
+    column = getattr(model, owner)
+    wanted = {t.id for t in upsert_tags(db, names)}
+    current = {tid for (tid,) in db.query(model.tag_id).filter(column == owner_id)}
+    stale = current - wanted
+    if stale:
+        db.query(model).filter(column == owner_id, model.tag_id.in_(stale)).delete(synchronize_session=False)
+    added = wanted - current
+    if added:
+        _insert_ignore(db, model, [{owner: owner_id, "tag_id": tid} for tid in sorted(added)])
+
+def sync_post_tags(db: Session, post_id: int, names):
+    _sync_links(db, PostTag, "post_id", post_id, names)
+
+def sync_project_tags(db: Session, project_id: int, names):
+    _sync_links(db, ProjectTag, "project_id", project_id, names)
+
+def remove_post_tags(db: Session, post_id: int):
+    db.query(PostTag).filter(PostTag.post_id == post_id).delete(synchronize_session=False)
+
+def remove_project_tags(db: Session, project_id: int):
+    db.query(ProjectTag).filter(ProjectTag.project_id == project_id).delete(synchronize_session=False)
@@ -1,6 +1,102 @@
+import asyncio
+import hashlib
+import logging
+import multiprocessing
 import os
+import tarfile
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 from ..core.config import settings
-from .malware.scanner import MalwareScanner
+from .malware.scanner import MalwareScanner, extract_features, warm_worker
+from .malware.cache import VerdictCache
+from .file_service import UploadTooLarge
+
+logger = logging.getLogger(__name__)
+
+# 超过该大小的载荷在线程池中计算摘要，避免阻塞事件循环
+HASH_INLINE_BYTES = 1024 * 1024
+
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+SPOOL_CHUNK = 1024 * 1024
+
+def _sha256(data: bytes):
+    return hashlib.sha256(data).hexdigest()
+
+async def spool_uploads(files):
+    # 表单文件在响应开始流式输出前就会被关闭，先复制到自有的临时文件
+    spooled, total = [], 0
+    try:
+        for upload in files:
+            f = tempfile.SpooledTemporaryFile(max_size=SPOOL_CHUNK)
+            spooled.append((upload.filename or "unnamed", f))
+            while chunk := await upload.read(SPOOL_CHUNK):
+                total += len(chunk)
+                if total > settings.scan_batch_max_bytes:
+                    raise UploadTooLarge("batch too large")
+                f.write(chunk)
+            f.seek(0)
+    except BaseException:
+        for _, f in spooled:
+            f.close()
+        raise
+    return spooled
+
+def _read_capped(f, limit: int):
+    data = f.read(limit + 1)
+    return None if len(data) > limit else data
+
+def _iter_archive(name: str, f, limit: int):
+    lower = name.lower()
+    if lower.endswith(".zip"):
+        with zipfile.ZipFile(f) as zf:
+            for info in zf.infolist():
+                if info.is_dir():
+                    continue
+                member = f"{name}/{info.filename}"
+                if info.file_size > limit:
+                    yield member, None, "文件过大"
+                    continue
+                try:
+                    with zf.open(info) as mf:
+                        data = _read_capped(mf, limit)
+                except Exception:
+                    yield member, None, "无法读取压缩包成员"
+                    continue
+                yield (member, data, None) if data is not None else (member, None, "文件过大")
+    else:
+        with tarfile.open(fileobj=f, mode="r:*") as tf:
+            for info in tf:
+                if not info.isfile():
+                    continue
+                member = f"{name}/{info.name}"
+                if info.size > limit:
+                    yield member, None, "文件过大"
+                    continue
+                yield member, tf.extractfile(info).read(), None
+
+def iter_samples(spooled):
+    """逐个产出 (名称, 内容, 错误)；zip/tar 压缩包展开为其中的文件"""
+    limit = settings.max_upload_bytes
+    count = 0
+    for name, f in spooled:
+        lower = name.lower()
+        if lower.endswith(".zip") or lower.endswith(TAR_SUFFIXES):
+            members = _iter_archive(name, f, limit)
+        else:
+            data = _read_capped(f, limit)
+            members = [(name, data, None) if data is not None else (name, None, "文件过大")]
+        try:
+            for sample in members:
+                if count >= settings.scan_batch_max_files:
+                    yield sample[0], None, "超出批量文件数上限"
+                    return
+                count += 1
+                yield sample
+        except (zipfile.BadZipFile, tarfile.TarError, EOFError, OSError):
+            yield name, None, "无法解析压缩包"
 
 class MalwareEngine:
     def __init__(self):
@@ -8,9 +104,199 @@ class MalwareEngine:
         model_dir = os.getenv('SCANNER_MODEL_DIR') or os.getenv('MALWARE_MODEL_DIR') or os.path.join(settings.upload_dir, 'models')
         threshold = float(os.getenv('SCANNER_THRESHOLD', '0.5'))
         self.scanner = MalwareScanner(model_dir=model_dir, threshold=threshold)
+        self.cache = VerdictCache(settings.scan_cache_path or None, settings.scan_cache_entries)
+        self.max_batch = settings.scan_max_batch
+        self.max_wait = settings.scan_max_wait_ms / 1000
+        self.pool = None
+        self.pool_lock = threading.Lock()
+        self.queue = None
+        self.batcher = None
+        self.extracting = 0
+        self.batches = 0
+        self.scanned = 0
+        self.last_batch_size = 0
+        self.max_batch_seen = 0
+        self.warmup_thread = None
+        self.fingerprint = None
+        self.refreshed_at = float("-inf")
 
     def predict(self, data: bytes):
         label, score = self.scanner.predict(data)
         return (label, score)
 
-engine = MalwareEngine()
\ No newline at end of file
+    def _get_pool(self):
+        # 预热线程与事件循环都会调用，加锁避免重复创建进程池
+        with self.pool_lock:
+            if self.pool is None:
+                # spawn 避免在带线程的服务进程里 fork
+                self.pool = ProcessPoolExecutor(max_workers=settings.scan_workers, mp_context=multiprocessing.get_context("spawn"))
+            return self.pool
+
+    def warm_up(self):
+        # 启动时在后台线程加载并校验模型、拉起特征提取进程，不阻塞服务启动
+        if self.warmup_thread is not None:
+            return self.warmup_thread
+        self.warmup_thread = threading.Thread(target=self._warm_up, name="scanner-warmup", daemon=True)
+        self.warmup_thread.start()
+        return self.warmup_thread
+
+    def _warm_up(self):
+        try:
+            if not self.scanner.ensure_initialized():
+                return
+            pool = self._get_pool()
+            for f in [pool.submit(warm_worker) for _ in range(settings.scan_workers)]:
+                f.result()
+            logger.info(f"Malware scanner warmed up: {len(self.scanner.models)} models, {settings.scan_workers} workers")
+        except Exception as e:
+            logger.error(f"Scanner warm-up error: {e}")
+
+    async def scan_many(self, samples, concurrency: int):
+        # 逐个读取样本并以有限并发扫描，结果按完成顺序产出
+        loop = asyncio.get_running_loop()
+        sem = asyncio.Semaphore(max(1, concurrency))
+        out = asyncio.Queue()
+        tasks = set()
+
+        async def run(index, name, data):
+            try:
+                # 摘要在线程池中只算一次，同时用作缓存键与返回值
+                digest = await loop.run_in_executor(None, _sha256, data)
+                label, confidence = await self.scan(data, digest)
+                item = {"index": index, "name": name, "sha256": digest, "label": label, "confidence": confidence}
+            except Exception as e:
+                logger.error(f"Batch scan error for {name}: {e}")
+                item = {"index": index, "name": name, "error": "扫描失败"}
+            finally:
+                sem.release()
+            await out.put(item)
+
+        async def feed():
+            it = iter(samples)
+            index = 0
+            try:
+                while (sample := await loop.run_in_executor(None, next, it, None)) is not None:
+                    name, data, error = sample
+                    if error:
+                        await out.put({"index": index, "name": name, "error": error})
+                    else:
+                        await sem.acquire()
+                        task = loop.create_task(run(index, name, data))
+                        tasks.add(task)
+                        task.add_done_callback(tasks.discard)
+                    index += 1
+                await asyncio.gather(*tasks)
+            finally:
+                await out.put(None)
+
+        feeder = loop.create_task(feed())
+        try:
+            while (item := await out.get()) is not None:
+                yield item
+            await feeder
+        finally:
+            # 客户端断开时取消尚未完成的扫描
+            feeder.cancel()
+            for task in list(tasks):
+                task.cancel()
+
+    def _ensure_batcher(self):
+        if self.batcher is None or self.batcher.done() or self.batcher.get_loop() is not asyncio.get_running_loop():
+            self.queue = asyncio.Queue()
+            self.batcher = asyncio.get_running_loop().create_task(self._batch_loop())
+
+    async def _refresh(self, loop):
+        # 检查模型目录要 glob 与 stat，放到线程池，且至多每 SCAN_REFRESH_SECONDS 秒一次
+        now = loop.time()
+        if self.fingerprint is None or now - self.refreshed_at >= settings.scan_refresh_seconds:
+            self.refreshed_at = now
+            self.fingerprint = await loop.run_in_executor(None, self.scanner.refresh)
+        return self.fingerprint
+
+    async def scan(self, data: bytes, digest: str | None = None):
+        loop = asyncio.get_running_loop()
+        fingerprint = await self._refresh(loop)
+        if not self.scanner.initialized:
+            await loop.run_in_executor(None, self.scanner.ensure_initialized)
+        if not self.scanner.ready:
+            return self.scanner.fallback(data)
+        # 相同内容在同一模型集合下判定不变，命中缓存时跳过特征提取与推理
+        if digest is None:
+            digest = await loop.run_in_executor(None, _sha256, data) if len(data) > HASH_INLINE_BYTES else _sha256(data)
+        # 缓存读取可能查 SQLite，指纹变化时还会清表，与写入一样放到线程池
+        cached = await loop.run_in_executor(None, self.cache.get, digest, fingerprint)
+        if cached is not None:
+            return cached
+        result = await self._scan_uncached(data)
+        if result is None:
+            return ("benign", 0.5)
+        await loop.run_in_executor(None, self.cache.put, digest, fingerprint, result)
+        return result
+
+    async def _scan_uncached(self, data: bytes):
+        # 返回 None 表示提取或推理失败，此类结果不写入缓存
+        loop = asyncio.get_running_loop()
+        self.extracting += 1
+        try:
+            feats = await loop.run_in_executor(self._get_pool(), extract_features, data)
+        except Exception as e:
+            logger.error(f"Feature extraction error: {e}")
+            feats = None
+        finally:
+            self.extracting -= 1
+        if feats is None:
+            return None
+        self._ensure_batcher()
+        fut = loop.create_future()
+        await self.queue.put((feats, fut))
+        return await fut
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait
+        # 仍有请求在提取特征时稍等片刻，把并发请求凑成一批
+        while len(batch) < self.max_batch:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if self.extracting == 0 or timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            try:
+                results = await loop.run_in_executor(None, self.scanner.predict_batch, np.stack([f for f, _ in batch]))
+            except Exception as e:
+                logger.error(f"Batch predict error: {e}")
+                results = [None] * len(batch)
+            for (_, fut), result in zip(batch, results):
+                if not fut.done():
+                    fut.set_result(result)
+            self.batches += 1
+            self.scanned += len(batch)
+            self.last_batch_size = len(batch)
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+
+    def metrics(self):
+        return {
+            **self.scanner.status(),
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            "extracting": self.extracting,
+            "batches": self.batches,
+            "scanned": self.scanned,
+            "last_batch_size": self.last_batch_size,
+            "max_batch_size": self.max_batch_seen,
+            "avg_batch_size": round(self.scanned / self.batches, 2) if self.batches else 0.0,
+            "cache": self.cache.stats(),
+        }
+
+engine = MalwareEngine()
@@ -1,14 +1,122 @@
-from sqlalchemy import create_engine
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from ..core.config import settings
+from .read_routing import ReadRouter, Replica
 
-engine = create_engine(settings.database_url, connect_args={"check_same_thread": False} if settings.database_url.startswith("sqlite") else {})
+# 同步连接串对应的异步驱动
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg", "mysql": "aiomysql"}
+
+def async_url(url):
+    u = make_url(url)
+    backend = u.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        return u
+    return u.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+def is_sqlite(url):
+    return make_url(url).get_backend_name() == "sqlite"
+
+def sqlite_pragmas(read_only: bool = False):
+    pragmas = {
+        "synchronous": settings.sqlite_synchronous,
+        "busy_timeout": settings.sqlite_busy_timeout,
+        "mmap_size": settings.sqlite_mmap_size,
+        "cache_size": settings.sqlite_cache_size,
+    }
+    if read_only:
+        # 只读连接不切换日志模式（WAL 持久化在库文件里，由读写连接设置）
+        pragmas["query_only"] = "ON"
+    else:
+        pragmas = {"journal_mode": settings.sqlite_journal_mode, **pragmas}
+    return {k: v for k, v in pragmas.items() if v}
+
+def engine_options(url):
+    u = make_url(url)
+    if is_sqlite(u) and u.database in (None, "", ":memory:"):
+        # 内存库使用 SQLAlchemy 默认的单连接池
+        return {}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": not is_sqlite(u),
+    }
+
+def apply_pragmas(engine, pragmas: dict):
+    if not pragmas:
+        return
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_conn, _record):
+        cursor = dbapi_conn.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+def _sync_engine(url, read_only: bool = False):
+    engine = create_engine(url, connect_args={"check_same_thread": False} if is_sqlite(url) else {}, **engine_options(url))
+    if is_sqlite(url):
+        apply_pragmas(engine, sqlite_pragmas(read_only))
+    return engine
+
+def _async_engine(url, read_only: bool = False):
+    options = engine_options(url)
+    if options:
+        # aiosqlite 默认 NullPool，每个请求都要重新建连接并执行 PRAGMA
+        options["poolclass"] = AsyncAdaptedQueuePool
+    engine = create_async_engine(async_url(url), **options)
+    if is_sqlite(url):
+        apply_pragmas(engine.sync_engine, sqlite_pragmas(read_only))
+    return engine
+
+engine = _sync_engine(settings.database_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+async_engine = _async_engine(settings.database_url)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+# 公开 GET 接口使用独立的只读连接池，写操作占用的连接不会挤占读请求
+read_engine = _async_engine(settings.database_url, read_only=True)
+ReadSessionLocal = async_sessionmaker(read_engine, expire_on_commit=False)
+read_router = ReadRouter(
+    read_engine,
+    [Replica(url, _async_engine(url, read_only=True)) for url in settings.database_read_urls],
+    window=settings.read_your_writes_seconds,
+    retry_seconds=settings.replica_retry_seconds,
+)
+
+def pool_status():
+    status = {"engine": engine.pool.status(), "async": async_engine.pool.status(), "read": read_engine.pool.status()}
+    for replica in read_router.replicas:
+        status[replica.name] = replica.engine.pool.status()
+    return status
+
+async def dispose_engines():
+    # 池中的 aiosqlite 连接各自持有后台线程，退出前需要显式关闭
+    await async_engine.dispose()
+    await read_engine.dispose()
+    for replica in read_router.replicas:
+        await replica.engine.dispose()
+    engine.dispose()
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_read_db(request: Request):
+    _, bind = await read_router.pick(request.headers)
+    # 副本出错时本次请求照常失败，引擎上的 handle_error 钩子负责摘除副本
+    async with ReadSessionLocal(bind=bind) as db:
+        yield db
\ No newline at end of file
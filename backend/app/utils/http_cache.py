@@ -0,0 +1,100 @@
+import hashlib
+from email.utils import formatdate, parsedate_to_datetime
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+
+def body_etag(body: bytes):
+    return 'W/"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+def _etag_matches(header: str, etag: str):
+    if header.strip() == "*":
+        return True
+    # 弱比较：忽略 W/ 前缀
+    wanted = etag.removeprefix("W/")
+    return any(t.strip().removeprefix("W/") == wanted for t in header.split(","))
+
+def is_not_modified(headers: Headers, etag: str | None, last_modified: float | None = None):
+    inm = headers.get("if-none-match")
+    if inm is not None:
+        return etag is not None and _etag_matches(inm, etag)
+    ims = headers.get("if-modified-since")
+    if ims and last_modified is not None:
+        try:
+            return int(last_modified) <= parsedate_to_datetime(ims).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def conditional(request, response: Response, validators):
+    """设置 ETag/Last-Modified；客户端缓存仍有效时返回 304 响应，路由可直接返回它而跳过渲染"""
+    if validators is None:
+        return None
+    etag, last_modified = validators
+    response.headers["ETag"] = etag
+    if last_modified is not None:
+        response.headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+    if is_not_modified(request.headers, etag, last_modified):
+        return Response(status_code=304, headers=dict(response.headers))
+    return None
+
+class HttpCacheMiddleware:
+    """为匹配前缀的 GET 响应补充 Cache-Control 与基于响应体的 ETag，并处理 If-None-Match"""
+
+    def __init__(self, app, policies: dict[str, str]):
+        self.app = app
+        # 最长前缀优先
+        self.policies = sorted(policies.items(), key=lambda kv: len(kv[0]), reverse=True)
+
+    def _policy(self, path: str):
+        for prefix, policy in self.policies:
+            if path == prefix or path.startswith(prefix.rstrip("/") + "/"):
+                return policy
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            return await self.app(scope, receive, send)
+        policy = self._policy(scope["path"])
+        if policy is None:
+            return await self.app(scope, receive, send)
+        request_headers = Headers(scope=scope)
+        if "authorization" in request_headers:
+            # 带令牌的请求（受保护内容）只允许浏览器私有缓存
+            policy = "private, no-cache"
+        start = None
+        chunks = []
+        passthrough = False
+
+        async def capture(message):
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                if message["status"] in (200, 304):
+                    headers.setdefault("Cache-Control", policy)
+                    headers.add_vary_header("Authorization")
+                # 非 200 或路由已给出 ETag 的响应直接透传
+                if message["status"] != 200 or "etag" in headers:
+                    passthrough = True
+                    await send(message)
+                else:
+                    start = message
+                return
+            if passthrough:
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body"):
+                return
+            body = b"".join(chunks)
+            headers = MutableHeaders(scope=start)
+            etag = body_etag(body)
+            headers["ETag"] = etag
+            if is_not_modified(request_headers, etag):
+                start["status"] = 304
+                del headers["content-length"]
+                del headers["content-type"]
+                body = b""
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, capture)
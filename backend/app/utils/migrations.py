@@ -0,0 +1,146 @@
+import logging
+import os
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from .database import Base
+from ..core.config import settings
+from ..models.counter import ContentCounter  # noqa: F401  注册 content_counters 表，供下方 create_all 建表
+from ..models.file import File
+from ..models.project import Project
+from ..services.tag_service import sync_project_tags, split_tags
+from ..services.counter_service import recount
+
+logger = logging.getLogger(__name__)
+
+# 模型或下方列迁移发生变化时递增，已是最新版本的库启动时跳过全部检查
+SCHEMA_VERSION = 6
+
+# 旧库缺失的列：(表名, 列名, 列定义)
+COLUMN_MIGRATIONS = [
+    ("posts", "uploader_name", "VARCHAR(100)"),
+    ("projects", "uploader_name", "VARCHAR(100)"),
+    ("projects", "is_published", "BOOLEAN DEFAULT 1"),
+    ("projects", "is_protected", "BOOLEAN DEFAULT 0"),
+    ("projects", "password_hash", "VARCHAR(255)"),
+    ("projects", "tags_text", "VARCHAR(255)"),
+    ("files", "sha256", "VARCHAR(64)"),
+    ("files", "ref_count", "INTEGER DEFAULT 0"),
+    ("files", "subdir", "VARCHAR(20)"),
+    ("tags", "post_count", "INTEGER NOT NULL DEFAULT 0"),
+    ("tags", "project_count", "INTEGER NOT NULL DEFAULT 0"),
+    ("categories", "post_count", "INTEGER NOT NULL DEFAULT 0"),
+]
+
+def _columns(engine, table: str):
+    # 每次新建 Inspector，避免读到缓存的旧结构
+    return {c["name"] for c in inspect(engine).get_columns(table)}
+
+def _indexes(engine, table: str):
+    return {i["name"] for i in inspect(engine).get_indexes(table)}
+
+def add_missing_columns(engine):
+    existing = {}
+    for table, column, ddl in COLUMN_MIGRATIONS:
+        if table not in existing:
+            existing[table] = _columns(engine, table)
+        if column in existing[table]:
+            continue
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+        except SQLAlchemyError:
+            # 多个 worker 首次启动时可能同时补列；另一进程已补上则忽略
+            if column not in _columns(engine, table):
+                raise
+        else:
+            logger.info("added column %s.%s", table, column)
+        existing[table].add(column)
+
+def create_missing_indexes(engine):
+    # create_all 不会给已存在的表补建索引，这里按模型声明逐个补齐
+    for table in Base.metadata.sorted_tables:
+        names = _indexes(engine, table.name)
+        for index in table.indexes:
+            if index.name in names:
+                continue
+            try:
+                index.create(bind=engine)
+            except SQLAlchemyError:
+                if index.name not in _indexes(engine, table.name):
+                    raise
+            else:
+                logger.info("created index %s", index.name)
+
+def backfill_project_tags(engine):
+    # 旧版本只在 projects.tags_text 中保存逗号分隔的标签
+    with Session(engine) as db:
+        rows = db.query(Project.id, Project.tags_text).filter(Project.tags_text.isnot(None), Project.tags_text != "").all()
+        for project_id, tags_text in rows:
+            sync_project_tags(db, project_id, split_tags(tags_text))
+        db.commit()
+    logger.info("backfilled tags for %d projects", len(rows))
+
+def backfill_counters(engine):
+    with Session(engine) as db:
+        totals = recount(db)
+        db.commit()
+    logger.info("recounted content counters: %s", totals)
+
+def scope_blob_dedup(engine):
+    # 去重范围从全表改为子目录内：按路径回填 subdir，sha256 上的唯一索引重建为普通索引
+    root = os.path.abspath(settings.upload_dir)
+    with Session(engine) as db:
+        rows = db.query(File.id, File.file_path).filter(File.subdir.is_(None)).all()
+        for file_id, path in rows:
+            rel = os.path.relpath(os.path.abspath(path), root)
+            subdir = rel.split(os.sep, 1)[0] if not rel.startswith("..") and os.sep in rel else None
+            db.query(File).filter(File.id == file_id).update({File.subdir: subdir}, synchronize_session=False)
+        db.commit()
+    index = next(i for i in File.__table__.indexes if i.name == "ix_files_sha256")
+    if any(i["name"] == index.name and i["unique"] for i in inspect(engine).get_indexes("files")):
+        with engine.begin() as conn:
+            index.drop(bind=conn)
+            index.create(bind=conn)
+    logger.info("scoped blob dedup by subdir for %d files", len(rows))
+
+def reset_search_index(engine):
+    # 搜索索引的收录范围变化（项目不再按 is_published 过滤）：删掉 FTS 表，启动时按新规则全量重建
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS search_index"))
+
+# (引入该数据迁移的结构版本, 迁移函数)
+DATA_MIGRATIONS = [
+    (2, backfill_project_tags),
+    (3, backfill_counters),
+    (5, scope_blob_dedup),
+    (6, reset_search_index),
+]
+
+def current_version(engine):
+    try:
+        with engine.connect() as conn:
+            return conn.execute(text("SELECT max(version) FROM schema_version")).scalar()
+    except SQLAlchemyError:
+        return None
+
+def set_version(engine, version: int):
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)"))
+        conn.execute(text("DELETE FROM schema_version"))
+        conn.execute(text("INSERT INTO schema_version (version) VALUES (:v)"), {"v": version})
+
+def run_migrations(engine):
+    """返回是否实际执行了迁移"""
+    version = current_version(engine)
+    if version is not None and version >= SCHEMA_VERSION:
+        return False
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine)
+    create_missing_indexes(engine)
+    for introduced, migrate in DATA_MIGRATIONS:
+        if (version or 0) < introduced:
+            migrate(engine)
+    set_version(engine, SCHEMA_VERSION)
+    logger.info("schema migrated from version %s to %s", version, SCHEMA_VERSION)
+    return True
@@ -0,0 +1,40 @@
+import base64
+from datetime import datetime
+from fastapi import HTTPException
+from sqlalchemy import or_, and_, select, func
+
+def encode_cursor(created_at: datetime, item_id: int):
+    raw = f"{created_at.isoformat()}|{item_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, item_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), int(item_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="无效的分页游标")
+
+async def _count(db, stmt, count=None):
+    if isinstance(count, int):
+        return count
+    if count is not None:
+        return await count()
+    return (await db.execute(select(func.count()).select_from(stmt.order_by(None).subquery()))).scalar_one()
+
+async def paginate_async(db, stmt, model, page: int, limit: int, cursor: str | None = None, with_total: bool | None = None, options=(), count=None):
+    # cursor 为 None 时沿用 page/offset 分页；传入 cursor（首页可为空串）时按 (created_at, id) 键集分页。
+    # stmt 为 select() 语句，db 为 AsyncSession；count 为已知总数或返回总数的协程函数（如读取冗余计数），缺省时对 stmt 执行 COUNT
+    order = (model.created_at.desc(), model.id.desc())
+    if cursor is None:
+        total = await _count(db, stmt, count) if with_total is not False else None
+        result = await db.execute(stmt.options(*options).order_by(*order).offset((page - 1) * limit).limit(limit))
+        return {"items": result.scalars().unique().all(), "total": total}
+    total = await _count(db, stmt, count) if with_total else None
+    if cursor:
+        created_at, item_id = decode_cursor(cursor)
+        stmt = stmt.where(or_(model.created_at < created_at, and_(model.created_at == created_at, model.id < item_id)))
+    rows = (await db.execute(stmt.options(*options).order_by(*order).limit(limit + 1))).scalars().unique().all()
+    items = rows[:limit]
+    next_cursor = encode_cursor(items[-1].created_at, items[-1].id) if len(rows) > limit else None
+    return {"items": items, "total": total, "next_cursor": next_cursor}
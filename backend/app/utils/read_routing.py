@@ -0,0 +1,172 @@
+import itertools
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError, InterfaceError
+from sqlalchemy.orm import Session
+from starlette.datastructures import Headers, MutableHeaders
+
+PRIMARY_COOKIE = "db_primary_until"
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+# 副本引擎上驱动层的连接/执行错误才判定副本不可用；路由自身抛出的异常（如内容文件缺失）与副本无关
+UNAVAILABLE_ERRORS = (OperationalError, InterfaceError)
+# 探活同时确认副本已有表结构
+PROBE_SQL = "SELECT 1 FROM schema_version LIMIT 1"
+
+# 当前请求的只读查询是否落在副本上，响应缓存据此决定能否回填
+_replica_read = ContextVar("replica_read", default=False)
+
+def reading_replica():
+    return _replica_read.get()
+
+# 当前请求内已提交写入的标记，由中间件设置为可变容器；同步路由在线程池中运行时上下文被复制，容器仍是同一个
+_request_writes = ContextVar("request_writes", default=None)
+
+@event.listens_for(Session, "after_flush")
+def _flushed(session, flush_context):
+    session.info["wrote"] = True
+
+@event.listens_for(Session, "do_orm_execute")
+def _dml(state):
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info["wrote"] = True
+
+@event.listens_for(Session, "after_commit")
+def _committed(session):
+    writes = _request_writes.get()
+    if session.info.pop("wrote", False) and writes is not None:
+        writes.add(True)
+
+@event.listens_for(Session, "after_rollback")
+def _rolled_back(session):
+    session.info.pop("wrote", None)
+
+class Replica:
+    def __init__(self, url: str, engine):
+        self.name = make_url(url).render_as_string(hide_password=True)
+        self.engine = engine
+        self.healthy = True
+        self.retry_at = 0.0
+        self.reads = 0
+        self.failures = 0
+
+class ReadRouter:
+    """只读请求在健康副本间轮询；最近有写入时回到主库，保证读到自己的写"""
+
+    def __init__(self, primary, replicas, window: float, retry_seconds: float):
+        self.primary = primary
+        self.replicas = replicas
+        self.window = window
+        self.retry_seconds = retry_seconds
+        self.counter = itertools.count()
+        self.last_write = float("-inf")
+        self.primary_reads = 0
+        self.pinned_reads = 0
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+        for replica in replicas:
+            self._watch(replica)
+
+    def _watch(self, replica: Replica):
+        @event.listens_for(replica.engine.sync_engine, "handle_error")
+        def on_error(context):
+            if isinstance(context.sqlalchemy_exception, UNAVAILABLE_ERRORS) or context.is_disconnect:
+                self.mark_down(replica, context.original_exception)
+
+    def mark_write(self):
+        self.last_write = time.monotonic()
+
+    def pinned(self, headers: Headers):
+        # 本进程刚处理过写请求，或客户端带着写后下发的 Cookie
+        if time.monotonic() - self.last_write < self.window:
+            return True
+        for part in headers.get("cookie", "").split(";"):
+            name, _, value = part.strip().partition("=")
+            if name == PRIMARY_COOKIE:
+                try:
+                    return float(value) > time.time()
+                except ValueError:
+                    return False
+        return False
+
+    def mark_down(self, replica: Replica, error):
+        with self.lock:
+            replica.failures += 1
+            if replica.healthy:
+                self.logger.warning("Read replica %s unavailable: %s", replica.name, error)
+            replica.healthy = False
+            replica.retry_at = time.monotonic() + self.retry_seconds
+
+    async def _probe(self, replica: Replica):
+        try:
+            async with replica.engine.connect() as conn:
+                await conn.execute(text(PROBE_SQL))
+        except Exception as e:
+            # 驱动层错误已由 handle_error 摘除，这里只补记其他异常
+            if not isinstance(e, UNAVAILABLE_ERRORS):
+                self.mark_down(replica, e)
+            return False
+        with self.lock:
+            replica.healthy = True
+        self.logger.info("Read replica %s is back", replica.name)
+        return True
+
+    async def check(self):
+        # 启动时探测一遍，避免首批请求落到不可用的副本上
+        for replica in self.replicas:
+            await self._probe(replica)
+
+    async def pick(self, headers: Headers):
+        """返回 (副本或 None, engine)，None 表示走主库"""
+        pinned = bool(self.replicas) and self.pinned(headers)
+        if self.replicas and not pinned:
+            start = next(self.counter)
+            now = time.monotonic()
+            for i in range(len(self.replicas)):
+                replica = self.replicas[(start + i) % len(self.replicas)]
+                if replica.healthy or (now >= replica.retry_at and await self._probe(replica)):
+                    with self.lock:
+                        replica.reads += 1
+                    _replica_read.set(True)
+                    return replica, replica.engine
+        with self.lock:
+            self.primary_reads += 1
+            if pinned:
+                self.pinned_reads += 1
+        return None, self.primary
+
+    def stats(self):
+        with self.lock:
+            return {
+                "primary_reads": self.primary_reads,
+                "pinned_reads": self.pinned_reads,
+                "replicas": [{"url": r.name, "healthy": r.healthy, "reads": r.reads, "failures": r.failures} for r in self.replicas],
+            }
+
+class ReadYourWritesMiddleware:
+    """已认证的请求实际提交了写入时下发短期 Cookie，期间该客户端的只读查询走主库；
+    只读的 POST（如恶意检测）不会把客户端钉在主库上"""
+
+    def __init__(self, app, router: ReadRouter):
+        self.app = app
+        self.router = router
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in WRITE_METHODS or "authorization" not in Headers(scope=scope):
+            return await self.app(scope, receive, send)
+
+        writes = set()
+        _request_writes.set(writes)
+
+        async def mark(message):
+            if message["type"] == "http.response.start" and message["status"] < 400 and writes:
+                self.router.mark_write()
+                if self.router.replicas:
+                    window = int(self.router.window) + 1
+                    MutableHeaders(scope=message).append("Set-Cookie", f"{PRIMARY_COOKIE}={time.time() + window:.0f}; Max-Age={window}; Path=/; HttpOnly; SameSite=Lax")
+            await send(message)
+
+        await self.app(scope, receive, mark)
@@ -0,0 +1,171 @@
+import functools
+import inspect
+import json
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+from ..core.config import settings
+from .read_routing import reading_replica
+
+logger = logging.getLogger(__name__)
+
+# 每个缓存条目都隐含依赖的标签，失效它即清空全部响应缓存
+ALL = "all"
+# 内容类型对应的失效标签：文章列表里带有标签与分类信息
+KIND_TAGS = {"post": ("posts", "tags"), "project": ("projects", "tags"), "life": ("life",)}
+
+class MemoryBackend:
+    """进程内 LRU，接口与 Redis 的 get/set/incr/mget 子集一致；
+    标签版本也在进程内，失效不会传到其他 worker，只适合单进程部署"""
+    blocking = False
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def get(self, key: str):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: bytes, ex: int | None = None):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + ex if ex else float("inf"), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def incr(self, key: str):
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + 1
+            return self.counters[key]
+
+    def mget(self, keys):
+        with self.lock:
+            return [self.counters.get(k) for k in keys]
+
+class RedisBackend:
+    """包装任意 redis-py 兼容客户端（get/set(ex=)/incr/mget）"""
+    blocking = True
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key: str):
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, ex: int | None = None):
+        self.client.set(key, value, ex=ex)
+
+    def incr(self, key: str):
+        return self.client.incr(key)
+
+    def mget(self, keys):
+        return self.client.mget(keys)
+
+def create_backend(url: str):
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        import redis
+        return RedisBackend(redis.Redis.from_url(url))
+    if settings.web_concurrency > 1 and settings.response_cache_entries > 0:
+        logger.warning(
+            "Response cache uses the in-process backend with %d workers: invalidation only reaches the worker "
+            "that handled the write, others may serve stale listings for up to %ds. Set RESPONSE_CACHE_URL to a Redis URL.",
+            settings.web_concurrency, settings.response_cache_ttl,
+        )
+    return MemoryBackend(settings.response_cache_entries)
+
+class ResponseCache:
+    def __init__(self, backend, ttl: int, prefix: str = "rc:", lag_window: float = 0):
+        self.backend = backend
+        self.ttl = ttl
+        self.prefix = prefix
+        # 写后多久内副本可能仍滞后；期间从副本读到的结果不写入缓存
+        self.lag_window = lag_window
+        self.stats_by_key = {}
+        self.lock = threading.Lock()
+
+    def _count(self, name: str, hit: bool):
+        with self.lock:
+            s = self.stats_by_key.setdefault(name, {"hits": 0, "misses": 0})
+            s["hits" if hit else "misses"] += 1
+
+    def _key(self, name: str, tags, params):
+        tags = (ALL, *tags)
+        versions = self.backend.mget([f"{self.prefix}v:{t}" for t in tags])
+        stamp = ".".join(str(int(v or 0)) for v in versions)
+        return f"{self.prefix}{name}:{stamp}:{urlencode(sorted(params.items()))}"
+
+    def _lookup(self, name, tags, params):
+        key = self._key(name, tags, params)
+        return key, self.backend.get(key)
+
+    def _recently_written(self):
+        stamp = self.backend.get(f"{self.prefix}w")
+        return stamp is not None and time.time() - float(stamp) < self.lag_window
+
+    def _store(self, key: str, result):
+        body = json.dumps(jsonable_encoder(result), ensure_ascii=False, separators=(",", ":")).encode()
+        # 写请求只钉住本进程与本客户端；其他 worker 在窗口内从滞后副本读到的旧数据不能回填共享缓存
+        if not (self.lag_window and reading_replica() and self._recently_written()):
+            self.backend.set(key, body, ex=self.ttl)
+        return body
+
+    def cached(self, name: str, tags=(), vary=()):
+        """缓存路由返回的 JSON；键由路由名、相关标签版本与 vary 中的参数组成"""
+        def decorator(fn):
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    params = {k: kwargs[k] for k in vary if kwargs.get(k) is not None}
+                    call = run_in_threadpool if self.backend.blocking else _direct
+                    key, body = await call(self._lookup, name, tags, params)
+                    self._count(name, body is not None)
+                    if body is None:
+                        body = await call(self._store, key, await fn(*args, **kwargs))
+                    return Response(content=body, media_type="application/json")
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                params = {k: kwargs[k] for k in vary if kwargs.get(k) is not None}
+                key, body = self._lookup(name, tags, params)
+                self._count(name, body is not None)
+                if body is None:
+                    body = self._store(key, fn(*args, **kwargs))
+                return Response(content=body, media_type="application/json")
+            return wrapper
+        return decorator
+
+    def invalidate(self, *tags):
+        for tag in tags:
+            self.backend.incr(f"{self.prefix}v:{tag}")
+        if self.lag_window:
+            self.backend.set(f"{self.prefix}w", str(time.time()).encode(), ex=math.ceil(self.lag_window))
+
+    def invalidate_kind(self, kind: str):
+        self.invalidate(*KIND_TAGS.get(kind, ()))
+
+    def stats(self):
+        with self.lock:
+            return {name: {**s, "hit_rate": round(s["hits"] / (s["hits"] + s["misses"]), 4) if s["hits"] + s["misses"] else 0.0} for name, s in self.stats_by_key.items()}
+
+async def _direct(fn, *args):
+    return fn(*args)
+
+response_cache = ResponseCache(create_backend(settings.response_cache_url), settings.response_cache_ttl,
+                               lag_window=settings.read_your_writes_seconds if settings.database_read_urls else 0)
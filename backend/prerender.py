@@ -0,0 +1,50 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from app.utils.database import SessionLocal
+# Post.author / Post.category 按类名解析关系，查询前须先注册这两个映射
+from app.models import user, category  # noqa: F401
+from app.models.post import Post
+from app.models.project import Project
+from app.models.life_post import LifePost
+from app.services.render_service import prerender, load_artifact
+
+def collect_paths(force: bool):
+    db = SessionLocal()
+    try:
+        paths = set()
+        for model in (Post, Project, LifePost):
+            for (path,) in db.query(model.content_path).filter(model.content_path.isnot(None)).all():
+                if not os.path.exists(path):
+                    print(f"missing: {path}")
+                    continue
+                if force or load_artifact(path) is None:
+                    paths.add(path)
+        return sorted(paths)
+    finally:
+        db.close()
+
+def _render(path: str):
+    doc = prerender(path)
+    return doc["word_count"]
+
+def main():
+    parser = argparse.ArgumentParser(description="为已有内容批量生成预渲染 HTML")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--force", action="store_true", help="忽略已有产物，全部重新渲染")
+    args = parser.parse_args()
+    paths = collect_paths(args.force)
+    done = failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(_render, p): p for p in paths}
+        for fut in as_completed(futures):
+            try:
+                fut.result()
+                done += 1
+            except Exception as e:
+                failed += 1
+                print(f"failed: {futures[fut]}: {e}")
+    print(f"rendered {done}, failed {failed}, total {len(paths)}")
+
+if __name__ == "__main__":
+    main()
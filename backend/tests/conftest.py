@@ -0,0 +1,46 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+# 应用在导入时读取配置，须先指向临时库与上传目录
+_tmp = tempfile.mkdtemp(prefix="blog-tests-")
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{_tmp}/blog.db",
+    DATABASE_READ_URLS="",
+    UPLOAD_DIR=f"{_tmp}/uploads",
+    ADMIN_PASSWORD="admin",
+    BCRYPT_ROUNDS="4",
+    HASH_WORKERS="0",
+    SCAN_WARMUP="0",
+    RESPONSE_CACHE_ENTRIES="0",
+)
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.main import app
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as c:
+        yield c
+
+@pytest.fixture(scope="session")
+def admin(client):
+    token = client.post("/api/auth/login", json={"username": "admin", "password": "admin"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+@contextmanager
+def capture_sql():
+    """记录期间所有引擎（同步、异步、只读）实际执行的 (SQL, 参数)"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
@@ -0,0 +1,40 @@
+import pytest
+from app.core.config import settings
+from app.services.access_service import grants
+
+
+@pytest.fixture(scope="module")
+def protected(client, admin):
+    post = client.post("/api/posts/", json={"title": "lockout", "summary": "s", "is_protected": True, "password": "right"}, headers=admin).json()
+    yield post["id"]
+    grants.failures.clear()
+
+
+def _try(client, pid, password, agent):
+    return client.post(f"/api/posts/{pid}/access", json={"password": password}, headers={"User-Agent": agent})
+
+
+def test_failures_lock_only_the_offending_client(client, protected):
+    for _ in range(settings.access_max_failures):
+        assert _try(client, protected, "wrong", "attacker").json()["post_access_token"] == ""
+    assert _try(client, protected, "wrong", "attacker").status_code == 429
+    r = _try(client, protected, "right", "visitor")
+    assert r.status_code == 200 and r.json()["post_access_token"]
+
+
+def test_total_failures_lock_everyone(client, protected, monkeypatch):
+    monkeypatch.setattr(settings, "access_max_total_failures", settings.access_max_failures + 3)
+    for i in range(3):
+        _try(client, protected, "wrong", f"bot-{i}")
+    assert _try(client, protected, "right", "late-visitor").status_code == 429
+
+
+def test_content_rejects_missing_and_revoked_tokens(client, admin):
+    pid = client.post("/api/posts/", json={"title": "empty", "summary": "s", "is_protected": True, "password": "pw1"}, headers=admin).json()["id"]
+    token = _try(client, pid, "pw1", "reader").json()["post_access_token"]
+    assert client.get(f"/api/posts/{pid}/content").status_code == 401
+    r = client.get(f"/api/posts/{pid}/content", headers={"Authorization": f"Bearer {token}"})
+    # 正文为空的受保护文章也正常返回，而不是被当作令牌失效
+    assert r.status_code == 200 and r.json()["content"] == ""
+    client.put(f"/api/posts/{pid}", json={"password": "pw2"}, headers=admin)
+    assert client.get(f"/api/posts/{pid}/content", headers={"Authorization": f"Bearer {token}"}).status_code == 403
@@ -0,0 +1,53 @@
+import pytest
+from app.utils.database import engine
+from .conftest import capture_sql
+
+@pytest.fixture(scope="module", autouse=True)
+def content(client, admin):
+    for i in range(3):
+        client.post("/api/posts/", json={"title": f"ix{i}", "tags": ["ix-tag"]}, headers=admin)
+        client.post("/api/projects/", json={"name": f"ix{i}"}, headers=admin)
+        client.post("/api/life-posts/", json={"title": f"ix{i}"}, headers=admin)
+
+def _plans(client, url, table):
+    """返回请求中读取 table 并排序的查询对应的 EXPLAIN QUERY PLAN 明细"""
+    with capture_sql() as statements:
+        assert client.get(url).status_code == 200
+    plans = []
+    with engine.connect() as conn:
+        for sql, params in statements:
+            if f"FROM {table}" in sql and "ORDER BY" in sql and sql.lstrip().upper().startswith("SELECT"):
+                rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql, params).all()
+                plans.append([r[-1] for r in rows])
+    assert plans, f"{url} issued no ordered query on {table}"
+    return plans
+
+def _assert_indexed(plan, table, index):
+    assert any(index in line for line in plan), plan
+    assert f"SCAN {table}" not in plan, plan
+    assert not any("TEMP B-TREE FOR ORDER BY" in line and "anon" not in line for line in plan[:2]), plan
+
+@pytest.mark.parametrize("url,table,index", [
+    ("/api/posts/?limit=5", "posts", "ix_posts_published_created"),
+    ("/api/posts/?limit=5&cursor=", "posts", "ix_posts_published_created"),
+    ("/api/posts/latest?limit=5", "posts", "ix_posts_published_created"),
+    ("/api/life-posts/?limit=5", "life_posts", "ix_life_posts_published_created"),
+    ("/api/projects/?limit=5", "projects", "ix_projects_created"),
+])
+def test_listing_uses_index(client, url, table, index):
+    for plan in _plans(client, url, table):
+        _assert_indexed(plan, table, index)
+        assert not any("TEMP B-TREE FOR ORDER BY" in line for line in plan), plan
+
+def test_tag_listing_uses_indexes(client):
+    # 连接顺序由规划器按数据量选择（从标签或从已发布文章出发），两表都必须走索引
+    for plan in _plans(client, "/api/tags/ix-tag/posts?limit=5", "posts"):
+        for table in ("posts", "post_tags"):
+            lines = [line for line in plan if line.split(" ")[1:2] == [table]]
+            assert lines and all("INDEX" in line for line in lines), plan
+
+def test_feed_branches_use_indexes(client):
+    plan = _plans(client, "/api/feed/?limit=5", "posts")[0]
+    for table, index in (("posts", "ix_posts_published_created"), ("projects", "ix_projects_created"), ("life_posts", "ix_life_posts_published_created")):
+        assert any(table in line and index in line for line in plan), plan
+        assert f"SCAN {table}" not in plan, plan
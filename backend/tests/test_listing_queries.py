@@ -0,0 +1,35 @@
+import pytest
+from .conftest import capture_sql
+
+LISTINGS = ["/api/posts/latest?limit={n}", "/api/posts/?limit={n}", "/api/posts/?limit={n}&cursor=", "/api/tags/qc-shared/posts?limit={n}"]
+
+@pytest.fixture(scope="module", autouse=True)
+def posts(client, admin):
+    categories = [c["id"] for c in client.get("/api/categories/").json()]
+    for i in range(12):
+        data = {"title": f"qc{i}", "summary": "s", "category_id": categories[i % len(categories)], "tags": ["qc-shared", f"qc-{i}", f"qc-{i % 3}"]}
+        assert client.post("/api/posts/", json=data, headers=admin).status_code == 200
+
+def _count(client, url):
+    with capture_sql() as statements:
+        r = client.get(url)
+    assert r.status_code == 200
+    return len(statements), r.json()
+
+@pytest.mark.parametrize("url", LISTINGS)
+def test_listing_query_count_does_not_grow_with_page_size(client, url):
+    # 标签、分类与作者批量加载：查询次数与本页条数无关
+    client.get(url.format(n=1))
+    small, _ = _count(client, url.format(n=1))
+    large, body = _count(client, url.format(n=12))
+    items = body if isinstance(body, list) else body["items"]
+    assert len(items) >= 10
+    assert large == small
+    assert large <= 4
+
+def test_listing_items_carry_relations(client):
+    _, items = _count(client, "/api/posts/latest?limit=12")
+    item = next(i for i in items if i["title"] == "qc5")
+    assert {t["name"] for t in item["tags"]} == {"qc-shared", "qc-5", "qc-2"}
+    assert item["category"]["name"]
+    assert item["author"]["username"] == "admin"
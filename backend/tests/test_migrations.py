@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import SQLAlchemyError
+from app.utils import migrations
+from app.utils.database import Base
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'm.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+def _race(monkeypatch, name, target, other_worker):
+    # 本进程检查完结构后，另一个 worker 抢先执行同一条迁移
+    real = getattr(migrations, name)
+    done = []
+
+    def inspect_then_race(engine, table):
+        result = real(engine, table)
+        if table == target and not done:
+            done.append(table)
+            with engine.begin() as conn:
+                conn.execute(text(other_worker))
+        return result
+
+    monkeypatch.setattr(migrations, name, inspect_then_race)
+
+
+def test_column_added_by_another_worker(engine, monkeypatch, caplog):
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE posts DROP COLUMN uploader_name"))
+    _race(monkeypatch, "_columns", "posts", "ALTER TABLE posts ADD COLUMN uploader_name VARCHAR(100)")
+    with caplog.at_level("INFO", logger=migrations.logger.name):
+        migrations.add_missing_columns(engine)
+    assert "uploader_name" in migrations._columns(engine, "posts")
+    assert "added column posts.uploader_name" not in caplog.text
+
+
+def test_index_created_by_another_worker(engine, monkeypatch, caplog):
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_posts_published_created"))
+    _race(monkeypatch, "_indexes", "posts", "CREATE INDEX ix_posts_published_created ON posts (is_published, created_at, id)")
+    with caplog.at_level("INFO", logger=migrations.logger.name):
+        migrations.create_missing_indexes(engine)
+    assert "created index ix_posts_published_created" not in caplog.text
+
+
+def test_real_column_errors_still_raise(engine, monkeypatch):
+    monkeypatch.setattr(migrations, "COLUMN_MIGRATIONS", [("posts", "broken", "NOT A TYPE (")])
+    with pytest.raises(SQLAlchemyError):
+        migrations.add_missing_columns(engine)
@@ -0,0 +1,11 @@
+def test_unpublished_project_visible_everywhere(client, admin):
+    files = {"file": ("zephyrdraft.md", b"# zephyrdraft\n\nbody text", "text/markdown")}
+    r = client.post("/api/projects/upload", files=files, data={"name": "zephyrdraft", "is_published": "false"}, headers=admin)
+    pid = r.json()["id"]
+    listed = client.get("/api/projects/?limit=100").json()["items"]
+    feed = client.get("/api/feed?kind=project&limit=100").json()["items"]
+    found = client.get("/api/search?q=zephyrdraft").json()["items"]
+    # 列表、信息流与搜索使用同一可见范围
+    assert pid in [p["id"] for p in listed]
+    assert pid in [i["id"] for i in feed]
+    assert ("project", pid) in [(i["kind"], i["id"]) for i in found]
@@ -0,0 +1,41 @@
+import json
+import pytest
+from app.utils import read_routing
+from app.utils.response_cache import MemoryBackend, ResponseCache
+
+
+def _cache_with_counter():
+    cache = ResponseCache(MemoryBackend(100), ttl=60, lag_window=5)
+    calls = []
+
+    @cache.cached("items", tags=("posts",))
+    def items():
+        calls.append(1)
+        return {"n": len(calls)}
+
+    return cache, items, calls
+
+
+@pytest.fixture
+def replica_read():
+    token = read_routing._replica_read.set(True)
+    yield
+    read_routing._replica_read.reset(token)
+
+
+def test_replica_reads_after_write_are_not_cached(replica_read):
+    cache, items, calls = _cache_with_counter()
+    cache.invalidate("posts")
+    items(); items()
+    # 写后窗口内副本可能滞后，两次都回源
+    assert len(calls) == 2
+    cache.backend.set(f"{cache.prefix}w", b"0")
+    assert json.loads(items().body) == {"n": 3}
+    assert json.loads(items().body) == {"n": 3}
+
+
+def test_primary_reads_after_write_are_cached():
+    cache, items, calls = _cache_with_counter()
+    cache.invalidate("posts")
+    items(); items()
+    assert len(calls) == 1
@@ -1,27 +1,64 @@
-import { useEffect, useState } from 'react'
+import { useEffect, useRef, useState } from 'react'
 import { api } from '@/services/api'
 import { Link } from 'react-router-dom'
 
 type Item = { id: number; kind: 'post' | 'life'; title: string; section: string; is_published: boolean; uploader_name?: string }
 
+const PAGE_SIZE = 20
+const SEARCH_DELAY = 300
+
 export default function PublishManager() {
   const [items, setItems] = useState<Item[]>([])
+  const [total, setTotal] = useState(0)
+  const [page, setPage] = useState(1)
+  const [kind, setKind] = useState('')
+  const [status, setStatus] = useState('')
+  const [search, setSearch] = useState('')
+  const [q, setQ] = useState('')
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState('')
+  const latest = useRef(0)
 
   async function fetchAll() {
+    const seq = ++latest.current
     setLoading(true)
     try {
-      const r = await api.get('/api/admin/publish')
+      const params: Record<string, any> = { page, limit: PAGE_SIZE }
+      if (kind) params.kind = kind
+      if (status) params.is_published = status === 'published'
+      if (q) params.q = q
+      const r = await api.get('/api/admin/publish', { params })
+      // 只采用最后一次请求的结果，避免慢响应覆盖新条件
+      if (seq !== latest.current) return
+      const nextTotal = r.data.total || 0
+      const last = Math.max(1, Math.ceil(nextTotal / PAGE_SIZE))
+      // 删除或隐藏后当前页越界时退回最后一页
+      if (page > last) {
+        setPage(last)
+        return
+      }
       setItems(r.data.items || [])
+      setTotal(nextTotal)
     } catch (e: any) {
-      setError(e.response?.data?.detail || '加载失败')
+      if (seq === latest.current) setError(e.response?.data?.detail || '加载失败')
     } finally {
-      setLoading(false)
+      if (seq === latest.current) setLoading(false)
     }
   }
 
-  useEffect(() => { fetchAll() }, [])
+  // 输入停顿后再发起搜索，并回到第一页
+  useEffect(() => {
+    const timer = setTimeout(() => {
+      if (search.trim() === q) return
+      setQ(search.trim())
+      setPage(1)
+    }, SEARCH_DELAY)
+    return () => clearTimeout(timer)
+  }, [search])
+
+  useEffect(() => { fetchAll() }, [page, kind, status, q])
+
+  const pages = Math.max(1, Math.ceil(total / PAGE_SIZE))
 
   async function togglePublish(it: Item, next: boolean) {
     await api.put(`/api/admin/publish/${it.kind}/${it.id}/publish`, null, { params: { is_published: next } })
@@ -31,7 +68,7 @@ export default function PublishManager() {
   async function remove(it: Item) {
     if (!confirm('确定删除？')) return
     await api.delete(`/api/admin/publish/${it.kind}/${it.id}`)
-    setItems(items.filter(x => !(x.id === it.id && x.kind === it.kind)))
+    await fetchAll()
   }
 
   return (
@@ -42,6 +79,20 @@ export default function PublishManager() {
           <p className="text-stone-600">统一管理笔记分享与个人生活的发布</p>
         </div>
 
+        <div className="mb-4 flex flex-wrap gap-3 text-sm">
+          <select value={kind} onChange={e => { setKind(e.target.value); setPage(1) }} className="px-3 py-2 rounded border border-stone-300 bg-white">
+            <option value="">全部板块</option>
+            <option value="post">笔记分享</option>
+            <option value="life">个人生活</option>
+          </select>
+          <select value={status} onChange={e => { setStatus(e.target.value); setPage(1) }} className="px-3 py-2 rounded border border-stone-300 bg-white">
+            <option value="">全部状态</option>
+            <option value="published">已发布</option>
+            <option value="hidden">已隐藏</option>
+          </select>
+          <input value={search} onChange={e => setSearch(e.target.value)} placeholder="搜索发布名称" className="px-3 py-2 rounded border border-stone-300 bg-white" />
+        </div>
+
         <div className="bg-white rounded-lg shadow overflow-x-auto">
           <table className="min-w-full text-sm">
             <thead>
@@ -90,6 +141,13 @@ export default function PublishManager() {
             </tbody>
           </table>
         </div>
+
+        <div className="mt-4 flex items-center justify-end gap-3 text-sm text-stone-700">
+          <span>共 {total} 条</span>
+          <button disabled={page <= 1} onClick={() => setPage(page - 1)} className="px-3 py-1 rounded bg-stone-200 disabled:opacity-50">上一页</button>
+          <span>{page} / {pages}</span>
+          <button disabled={page >= pages} onClick={() => setPage(page + 1)} className="px-3 py-1 rounded bg-stone-200 disabled:opacity-50">下一页</button>
+        </div>
       </div>
     </div>
   )
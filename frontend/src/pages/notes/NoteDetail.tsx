@@ -9,6 +9,23 @@ export default function NoteDetail() {
   const [needPassword, setNeedPassword] = useState(false)
   const [input, setInput] = useState('')
   const [accessToken, setAccessToken] = useState<string | null>(null)
+  const [error, setError] = useState('')
+  const tokenKey = `post_access_token:${id}`
+
+  // 令牌过期或密码已修改时后端返回 403：清掉本地令牌，重新显示密码框
+  function expire(message = '') {
+    sessionStorage.removeItem(tokenKey)
+    setAccessToken(null)
+    setContent('')
+    setError(message)
+  }
+
+  function loadContent(token: string | null) {
+    const headers = token ? { Authorization: `Bearer ${token}` } : undefined
+    return api.get(`/api/posts/${id}/content`, { headers }).then(c => setContent(c.data.content)).catch(err => {
+      if (token && [401, 403].includes(err?.response?.status)) expire('访问已过期，请重新输入密码')
+    })
+  }
 
   useEffect(() => {
     if (!id) return
@@ -16,16 +33,27 @@ export default function NoteDetail() {
       setPost(r.data)
       setNeedPassword(r.data.is_protected)
       if (!r.data.is_protected) {
-        api.get(`/api/posts/${id}/content`).then(c => setContent(c.data.content))
+        loadContent(null)
+        return
+      }
+      const saved = sessionStorage.getItem(tokenKey)
+      if (saved) {
+        setAccessToken(saved)
+        loadContent(saved)
       }
     })
   }, [id])
 
   function submitPassword() {
+    setError('')
     api.post(`/api/posts/${id}/access`, { password: input }).then(r => {
       const token = r.data.post_access_token
+      if (!token) return setError('密码错误')
+      sessionStorage.setItem(tokenKey, token)
       setAccessToken(token)
-      api.get(`/api/posts/${id}/content`, { headers: { Authorization: `Bearer ${token}` } }).then(c => setContent(c.data.content))
+      loadContent(token)
+    }).catch(err => {
+      if (err?.response?.status === 429) setError('尝试次数过多，请稍后再试')
     })
   }
 
@@ -38,6 +66,7 @@ export default function NoteDetail() {
         <div className="bg-white p-4 rounded shadow flex gap-2">
           <input className="border px-2 py-1 flex-1" placeholder="输入访问密码" value={input} onChange={e => setInput(e.target.value)} />
           <button className="px-3 py-1 bg-primary text-white rounded" onClick={submitPassword}>访问</button>
+          {error && <span className="text-red-500 text-sm self-center">{error}</span>}
         </div>
       ) : (
         <article className="bg-white p-4 rounded shadow" dangerouslySetInnerHTML={{ __html: content.replace(/<script[\s\S]*?>[\s\S]*?<\/script>/gi, '') }} />